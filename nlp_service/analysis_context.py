@@ -0,0 +1,51 @@
+"""
+Analysis Context
+Per-document views (lowered text, tokens, script counts, sentences) that the
+preprocessor and every classifier detector share, so each complaint is
+lowered, tokenized and scanned once.
+"""
+
+from functools import cached_property
+from typing import Dict, FrozenSet, List
+
+from keyword_matcher import KeywordHits
+import profiling
+from text_patterns import SENTENCE_END, char_profile
+
+
+class AnalysisContext:
+    def __init__(self, text: str, keyword_hits: KeywordHits = None):
+        self.text = text
+        # Filled in by the classifier's keyword scan
+        self.keyword_hits = keyword_hits
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        return self.text.split()
+
+    @cached_property
+    def lower_tokens(self) -> List[str]:
+        return self.lower.split()
+
+    @cached_property
+    def lower_token_set(self) -> FrozenSet[str]:
+        return frozenset(self.lower_tokens)
+
+    @cached_property
+    def profile(self) -> Dict[str, int]:
+        """Script and letter counts, see text_patterns.char_profile"""
+        return char_profile(self.text)
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        """Text split on Bengali danda and Latin sentence punctuation"""
+        profiling.count('regex_scans')
+        return SENTENCE_END.split(self.text)
+
+    @property
+    def has_sentence_end(self) -> bool:
+        return len(self.sentences) > 1
@@ -0,0 +1,200 @@
+"""
+Inference Backend Parity Check
+Runs complaints_dataset.json through the PyTorch backend (the reference) and
+the ONNX Runtime backend, each in a fresh interpreter, and compares:
+
+    translation   BanglishBERT output for the Banglish complaints (exact match,
+                  character similarity)
+    decisions     validity, priority, severity, sentiment and category of the
+                  Banglish complaints judged on their translation, as
+                  rejudge_complaints.py does (the only decisions a model affects)
+    embeddings    mBERT [CLS] vectors (cosine similarity per complaint)
+
+It also reports model load time, inference time and peak RSS per backend, and
+exits non-zero when a parity threshold is missed.
+
+Usage: python backend_parity.py [--dataset complaints_dataset.json] [--limit N]
+       [--min-cosine 0.99] [--min-translation-match 0.95] [--min-agreement 0.98]
+       [--output parity.json]
+Export the ONNX models first: python export_onnx.py
+"""
+
+import argparse
+import difflib
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REFERENCE = 'torch'
+
+DECISIONS = {
+    'is_valid': ('validity', 'is_valid'),
+    'priority': ('priority', 'priority_level'),
+    'severity': ('severity', 'severity_level'),
+    'sentiment': ('sentiment', 'sentiment'),
+    'category': ('category', 'category'),
+}
+
+
+def _run_backend(backend: str, texts: List[str], banglish: List[int]) -> Dict:
+    """Runs in a fresh interpreter with INFERENCE_BACKEND=backend"""
+    os.environ['INFERENCE_BACKEND'] = backend
+    os.environ['NLP_MODE'] = 'full'
+    # A persistent translation cache would serve one backend's output to the other
+    os.environ['TRANSLATION_CACHE_PATH'] = ''
+    sys.path.insert(0, DIRECTORY)
+    from classifier import ComplaintClassifier
+    from model_registry import model_registry
+    from preprocessor import TextPreprocessor
+
+    load_s = {}
+    for name in ('banglishbert', 'mbert'):
+        started = time.perf_counter()
+        model_registry.get(name)  # raises if the model cannot be loaded
+        load_s[name] = round(time.perf_counter() - started, 2)
+
+    preprocessor = TextPreprocessor()
+    classifier = ComplaintClassifier()
+
+    # Translate directly (no cache, no dictionary fallback hiding a failure)
+    prepared = [preprocessor.preprocess(texts[i]) for i in banglish]
+    started = time.perf_counter()
+    translations = preprocessor._generate_batch(
+        model_registry.get('banglishbert'), [cleaned for cleaned, _ in prepared]
+    )
+    translation_s = time.perf_counter() - started
+
+    # Judge the translation with the original text's features, as the rejudge job does
+    results = [
+        classifier.analyze_complaint(translation, features)
+        for translation, (_, features) in zip(translations, prepared)
+    ]
+
+    started = time.perf_counter()
+    embeddings = classifier.get_embeddings(texts)
+    embedding_s = time.perf_counter() - started
+
+    return {
+        'embeddings': embeddings,
+        'translations': translations,
+        'decisions': [
+            {name: result[section][key] for name, (section, key) in DECISIONS.items()}
+            for result in results
+        ],
+        'seconds': {
+            'load': load_s,
+            'translation': round(translation_s, 3),
+            'embeddings': round(embedding_s, 3),
+        },
+        # ru_maxrss is in KB on Linux
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def cosine_similarities(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    return np.sum(reference * candidate, axis=1) / np.maximum(norms, 1e-12)
+
+
+def compare(reference: Dict, candidate: Dict) -> Dict:
+    cosines = cosine_similarities(reference['embeddings'], candidate['embeddings'])
+    pairs = list(zip(reference['translations'], candidate['translations']))
+    decisions = list(zip(reference['decisions'], candidate['decisions']))
+    return {
+        'embeddings': {
+            'mean_cosine': round(float(cosines.mean()), 5) if len(cosines) else None,
+            'min_cosine': round(float(cosines.min()), 5) if len(cosines) else None,
+        },
+        'translation': {
+            'count': len(pairs),
+            'exact_match': round(sum(a == b for a, b in pairs) / len(pairs), 4) if pairs else None,
+            'char_similarity': round(
+                sum(difflib.SequenceMatcher(None, a, b).ratio() for a, b in pairs) / len(pairs), 4
+            ) if pairs else None,
+        },
+        'decisions': {
+            name: round(sum(a[name] == b[name] for a, b in decisions) / len(decisions), 4)
+            for name in DECISIONS
+        } if decisions else {},
+        'speedup': {
+            stage: round(reference['seconds'][stage] / candidate['seconds'][stage], 2)
+            for stage in ('translation', 'embeddings')
+            if candidate['seconds'][stage]
+        },
+        'peak_rss_mb': {
+            'reference': round(reference['peak_rss_kb'] / 1024, 1),
+            'candidate': round(candidate['peak_rss_kb'] / 1024, 1),
+        }
+    }
+
+
+def load_dataset(path: str, limit: int = None):
+    with open(path, 'r', encoding='utf-8') as f:
+        complaints = [c for c in json.load(f) if c.get('description')][:limit]
+    texts = [c['description'] for c in complaints]
+    banglish = [i for i, c in enumerate(complaints) if c.get('language') == 'banglish']
+    return texts, banglish
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the ONNX Runtime backend against PyTorch")
+    parser.add_argument('--dataset', default=os.path.join(DIRECTORY, 'complaints_dataset.json'))
+    parser.add_argument('--backend', default='onnx', help="backend to check against torch")
+    parser.add_argument('--limit', type=int, help="only the first N complaints")
+    parser.add_argument('--min-cosine', type=float, default=0.99, help="minimum mean embedding cosine")
+    parser.add_argument('--min-translation-match', type=float, default=0.95,
+                        help="minimum share of identical Banglish translations")
+    parser.add_argument('--min-agreement', type=float, default=0.98,
+                        help="minimum agreement per decision on translated Banglish complaints")
+    parser.add_argument('--output', help="write the report as JSON")
+    args = parser.parse_args()
+
+    texts, banglish = load_dataset(args.dataset, args.limit)
+    print(f"📊 {len(texts)} complaints ({len(banglish)} Banglish) from {os.path.basename(args.dataset)}")
+
+    runs = {}
+    ctx = multiprocessing.get_context('spawn')
+    for backend in (REFERENCE, args.backend):
+        print(f"🚀 Running {backend}...")
+        with ctx.Pool(1) as pool:
+            runs[backend] = pool.apply(_run_backend, (backend, texts, banglish))
+        print(f"  {runs[backend]['seconds']}, peak RSS {runs[backend]['peak_rss_kb'] / 1024:.0f} MB")
+
+    report = compare(runs[REFERENCE], runs[args.backend])
+    print(f"\n📊 {args.backend} vs {REFERENCE}")
+    print(f"  Translation: exact {report['translation']['exact_match']}, "
+          f"char similarity {report['translation']['char_similarity']} ({report['translation']['count']} texts)")
+    print("  Decisions on the translated Banglish complaints:")
+    for name, agreement in report['decisions'].items():
+        print(f"    {name:<12} agreement {agreement:.2%}")
+    print(f"  Embeddings:  mean cosine {report['embeddings']['mean_cosine']}, min {report['embeddings']['min_cosine']}")
+    print(f"  Speedup:     {report['speedup']}")
+    print(f"  Peak RSS:    {report['peak_rss_mb']['reference']} MB -> {report['peak_rss_mb']['candidate']} MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'backend': args.backend, 'dataset': args.dataset, 'seconds': {
+                backend: run['seconds'] for backend, run in runs.items()
+            }, **report}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Report saved to {args.output}")
+
+    failures = []
+    if (report['translation']['exact_match'] or 0) < args.min_translation_match:
+        failures.append(f"translation exact match below {args.min_translation_match:.0%}")
+    failures += [
+        f"{name} agreement below {args.min_agreement:.0%}"
+        for name, agreement in report['decisions'].items() if agreement < args.min_agreement
+    ]
+    if (report['embeddings']['mean_cosine'] or 0) < args.min_cosine:
+        failures.append(f"mean cosine below {args.min_cosine}")
+    if failures:
+        print(f"❌ Parity check failed: {'; '.join(failures)}")
+        sys.exit(1)
+    print("✅ Outputs match within thresholds")
@@ -1,28 +1,69 @@
 """
 Banglish to Bengali Mapping Dictionary
-This file is generated from a large JSON dataset to avoid memory overhead of raw JSON parsing repeatedly.
+The JSON source is compiled once into a memory-mapped binary file
+(banglish_dictionary.bin) so importing this module parses nothing and all
+worker processes share the same dictionary pages.
 """
 
 import json
 import os
+import threading
+
+from compiled_dict import CompiledDict, write_compiled_dict
+from fuzzy_index import FuzzyIndex
+
+DICT_JSON_PATH = os.path.join(os.path.dirname(__file__), 'banglish_dictionary.json')
+DICT_BIN_PATH = os.path.join(os.path.dirname(__file__), 'banglish_dictionary.bin')
+
+
+def load_json_dictionary(json_path: str = DICT_JSON_PATH) -> dict:
+    """Parse the JSON source dictionary"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compile_banglish_dictionary(json_path: str = DICT_JSON_PATH, bin_path: str = DICT_BIN_PATH) -> int:
+    """Compile the JSON dictionary into the binary format. Returns entry count."""
+    return write_compiled_dict(load_json_dictionary(json_path), bin_path)
+
+
+def _is_stale(json_path: str, bin_path: str) -> bool:
+    if not os.path.exists(bin_path):
+        return True
+    return os.path.exists(json_path) and os.path.getmtime(json_path) > os.path.getmtime(bin_path)
+
 
 def load_banglish_dictionary():
     try:
-        # Load the large dictionary file
-        # In a real 20k word scenario, you might want to use a database (SQLite) or a Trie structure
-        # for memory efficiency. For now, a Python dict is extremely fast for lookups up to 100k-500k items.
-        
-        dict_path = os.path.join(os.path.dirname(__file__), 'banglish_dictionary.json')
-        
-        with open(dict_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-            
+        # Rebuild the compiled file if it is missing or older than the JSON source
+        if _is_stale(DICT_JSON_PATH, DICT_BIN_PATH):
+            compile_banglish_dictionary()
+        return CompiledDict(DICT_BIN_PATH)
+
+    except Exception as e:
+        print(f"Warning: Could not load compiled Banglish dictionary: {e}")
+
+    try:
+        return load_json_dictionary()
     except Exception as e:
         print(f"Warning: Could not load Banglish dictionary: {e}")
         return {}
 
-# Load on module import
+# Load on module import (maps the file; nothing is parsed)
 BANGLISH_TO_BN = load_banglish_dictionary()
 
-# Create a set of keys for O(1) existence checks in Language Detection
-BANGLISH_MARKERS_SET = set(BANGLISH_TO_BN.keys())
+# Key view for existence checks in Language Detection (same lookups as the mapping)
+BANGLISH_MARKERS_SET = BANGLISH_TO_BN.keys()
+
+# Approximate-match index over the dictionary keys, built on first use
+_fuzzy_index = None
+_fuzzy_index_lock = threading.Lock()
+
+def get_fuzzy_index() -> FuzzyIndex:
+    """Shared spelling-correction index (cutoff 0.85, same as the old difflib call)"""
+    global _fuzzy_index
+    if _fuzzy_index is None:
+        with _fuzzy_index_lock:
+            if _fuzzy_index is None:
+                _fuzzy_index = FuzzyIndex(BANGLISH_TO_BN.keys(), cutoff=0.85)
+    return _fuzzy_index
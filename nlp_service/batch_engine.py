@@ -0,0 +1,63 @@
+"""
+Batch Analysis Engine
+Runs the analysis pipeline stage by stage over a whole batch of complaints
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from preprocessor import TextPreprocessor
+from classifier import ComplaintClassifier
+
+
+class BatchEngine:
+    def __init__(self, preprocessor: TextPreprocessor, classifier: ComplaintClassifier):
+        self.preprocessor = preprocessor
+        self.classifier = classifier
+
+    @contextmanager
+    def _stage(self, timings: Dict[str, float], name: str):
+        """Accumulate wall-clock time of a pipeline stage in milliseconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            timings[name] = round(timings.get(name, 0.0) + elapsed, 2)
+
+    def analyze(self, texts: List[str]) -> Tuple[List[Dict], Dict[str, float]]:
+        """
+        Analyze a batch of complaint texts
+        Returns: (results in input order, per-stage timings in ms)
+        """
+        _, results, timings = self.analyze_detailed(texts)
+        return results, timings
+
+    def analyze_detailed(self, texts: List[str], cleaned_texts: Optional[List[str]] = None
+                         ) -> Tuple[List[str], List[Dict], Dict[str, float]]:
+        """
+        Analyze a batch of complaint texts
+        cleaned_texts: clean_text() of each text, if the caller already has them
+        Returns: (cleaned texts, results, per-stage timings in ms), all in input order
+        """
+        timings: Dict[str, float] = {}
+
+        # Stage 1: preprocess every text (each cleaned text gets one shared context)
+        with self._stage(timings, 'preprocess'):
+            prepared = self.preprocessor.prepare_batch(texts, cleaned_texts)
+            contexts = [context for context, _ in prepared]
+            cleaned_texts = [context.text for context in contexts]
+
+        # Stage 2: one keyword scan over the whole batch
+        with self._stage(timings, 'keywords'):
+            self.classifier.scan_contexts(contexts)
+
+        # Stage 3: rule-based detectors
+        with self._stage(timings, 'analysis'):
+            results = [
+                self.classifier.analyze_complaint(context.text, features, context=context)
+                for context, features in prepared
+            ]
+
+        return cleaned_texts, results, timings
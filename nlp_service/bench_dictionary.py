@@ -0,0 +1,89 @@
+"""
+Benchmark: Banglish dictionary loading
+Compares the compiled memory-mapped dictionary against the old json.load loader
+(import time, resident memory, lookup latency). Each loader runs in a fresh
+interpreter so import time and RSS are not polluted by the other.
+
+Usage: python bench_dictionary.py [--runs 5]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+JSON_LOADER = """
+import json, os
+with open(os.path.join(DIR, 'banglish_dictionary.json'), 'r', encoding='utf-8') as f:
+    BANGLISH_TO_BN = json.load(f)
+BANGLISH_MARKERS_SET = set(BANGLISH_TO_BN.keys())
+"""
+
+COMPILED_LOADER = """
+from banglish_dict import BANGLISH_TO_BN, BANGLISH_MARKERS_SET
+"""
+
+PROBE = """
+import json, os, resource, sys, time
+DIR = {dir!r}
+sys.path.insert(0, DIR)
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+rss_before = rss_kb()
+start = time.perf_counter()
+{loader}
+load_ms = (time.perf_counter() - start) * 1000
+rss_after = rss_kb()
+
+words = ['ami', 'kharap', 'dam', 'beshi', 'niyeche', 'quality', 'xqzt', 'dokan', 'chal', 'onek']
+lookups = 200000
+start = time.perf_counter()
+for i in range(lookups):
+    w = words[i % len(words)]
+    if w in BANGLISH_MARKERS_SET:
+        BANGLISH_TO_BN[w]
+lookup_ns = (time.perf_counter() - start) / lookups * 1e9
+
+print(json.dumps({{'load_ms': load_ms, 'rss_delta_kb': rss_after - rss_before, 'lookup_ns': lookup_ns}}))
+"""
+
+
+def run_probe(loader: str, directory: str) -> dict:
+    code = PROBE.format(dir=directory, loader=loader)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs: list) -> dict:
+    return {key: sorted(run[key] for run in runs)[len(runs) // 2] for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Banglish dictionary loaders")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters per loader (median reported)")
+    args = parser.parse_args()
+
+    import os
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    # Make sure the compiled file exists so its build time is not measured
+    run_probe(COMPILED_LOADER, directory)
+
+    results = {
+        'json.load': summarize([run_probe(JSON_LOADER, directory) for _ in range(args.runs)]),
+        'compiled (mmap)': summarize([run_probe(COMPILED_LOADER, directory) for _ in range(args.runs)]),
+    }
+
+    print(f"{'loader':<18}{'import (ms)':>14}{'RSS delta (MB)':>17}{'lookup (ns)':>14}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['load_ms']:>14.1f}{r['rss_delta_kb'] / 1024:>17.1f}{r['lookup_ns']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
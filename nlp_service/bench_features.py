@@ -0,0 +1,163 @@
+"""
+Benchmark: feature extraction
+Times TextPreprocessor.extract_features against the previous implementation
+(inline regex strings, one scan per feature) on ~1KB complaints built from
+complaints_dataset.json, checks both return the same features, and reports
+the time per complaint for each language.
+
+Usage: python bench_features.py [--rounds 5]
+"""
+
+import argparse
+import json
+import re
+import time
+from collections import defaultdict
+
+import emoji
+from langdetect import detect, LangDetectException
+
+from preprocessor import TextPreprocessor
+
+
+def legacy_detect_language(preprocessor: TextPreprocessor, text: str) -> str:
+    """detect_language as it was: script ratios from two findall scans"""
+    try:
+        bengali_chars = re.findall(r'[\u0980-\u09FF]', text)
+        english_chars = re.findall(r'[a-zA-Z]', text)
+
+        text_len = max(len(text), 1)
+        bengali_ratio = len(bengali_chars) / text_len
+        english_ratio = len(english_chars) / text_len
+
+        if bengali_ratio > 0.15 and english_ratio > 0.15:
+            return 'mixed'
+        if bengali_ratio > 0.3:
+            return 'bn'
+        if english_ratio > 0.3:
+            words = text.lower().split()
+            english_word_count = sum(1 for w in words if w in preprocessor.english_stopwords)
+            if english_word_count >= 2 or (len(words) > 3 and english_word_count / len(words) > 0.2):
+                return 'en'
+            banglish_count = sum(1 for w in words if w in preprocessor.banglish_markers and w not in preprocessor.english_stopwords)
+            total_words = len(words)
+            if banglish_count >= 2 or (total_words > 0 and banglish_count/total_words > 0.3):
+                return 'mixed'
+            return 'en'
+
+        lang = detect(text)
+        return 'bn' if lang == 'bn' else 'en'
+
+    except LangDetectException:
+        return 'en'
+
+
+def legacy_clean_text(text: str) -> str:
+    """clean_text as it was: inline pattern strings"""
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    text = re.sub(r'\S+@\S+', '', text)
+    text = emoji.demojize(text, language='en')
+    text = re.sub(r'([!?.]){2,}', r'\1', text)
+    text = ' '.join(text.split())
+    text = text.translate(str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789'))
+    text = re.sub(r'া', 'া', text)
+    text = re.sub(r'ি', 'ি', text)
+    text = ' '.join(text.split())
+    return text.strip()
+
+
+def legacy_extract_features(preprocessor: TextPreprocessor, text: str) -> dict:
+    """extract_features as it was: one regex scan per feature"""
+    language = legacy_detect_language(preprocessor, text)
+    cleaned_text = legacy_clean_text(text)
+
+    words = cleaned_text.split()
+    word_count = len(words)
+    char_count = len(cleaned_text)
+    has_bengali = bool(re.search(r'[\u0980-\u09FF]', cleaned_text))
+    bengali_vowel_count = len(re.findall(r'[\u09BE\u09BF\u09C0\u09C1\u09C2\u09C3\u09C7\u09C8\u09CB\u09CC]', cleaned_text))
+    return {
+        'cleaned_text': cleaned_text,
+        'language': language,
+        'word_count': word_count,
+        'char_count': char_count,
+        'has_numbers': bool(re.search(r'\d', cleaned_text)),
+        'has_bengali': has_bengali,
+        'has_english': bool(re.search(r'[a-zA-Z]', cleaned_text)),
+        'exclamation_count': cleaned_text.count('!'),
+        'question_count': cleaned_text.count('?'),
+        'capital_ratio': sum(1 for c in cleaned_text if c.isupper()) / max(char_count, 1),
+        'repeated_char_ratio': len(re.findall(r'(.)\1{2,}', cleaned_text)) / max(char_count, 1),
+        'consonant_clusters': len(re.findall(r'[bcdfghjklmnpqrstvwxyz]{4,}', cleaned_text.lower())),
+        'vowel_ratio': bengali_vowel_count / max(char_count, 1) if has_bengali else 0,
+        'space_ratio': cleaned_text.count(' ') / max(char_count, 1),
+        'avg_word_length': sum(len(word) for word in words) / max(word_count, 1)
+    }
+
+
+def one_kb_complaints(dataset_path: str) -> dict:
+    """Complaints of each language concatenated into ~1KB (UTF-8) texts"""
+    with open(dataset_path, 'r', encoding='utf-8') as f:
+        complaints = json.load(f)
+
+    by_language = defaultdict(list)
+    for complaint in complaints:
+        by_language[complaint.get('language', 'unknown')].append(complaint['description'])
+
+    texts = {}
+    for language, descriptions in by_language.items():
+        texts[language] = []
+        current = ''
+        for description in descriptions:
+            current = f"{current} {description}".strip()
+            if len(current.encode('utf-8')) >= 1024:
+                texts[language].append(current)
+                current = ''
+    return texts
+
+
+def time_per_text(extractors: list, texts: list, rounds: int) -> list:
+    """Best-of-rounds mean microseconds per text for each extractor (rounds interleaved)"""
+    best = [float('inf')] * len(extractors)
+    for _ in range(rounds):
+        for i, extract in enumerate(extractors):
+            start = time.perf_counter()
+            for text in texts:
+                extract(text)
+            best[i] = min(best[i], (time.perf_counter() - start) / len(texts))
+    return [seconds * 1e6 for seconds in best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark feature extraction per 1KB complaint")
+    parser.add_argument('--dataset', default='complaints_dataset.json')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    preprocessor = TextPreprocessor(use_banglishbert=False)
+    texts = one_kb_complaints(args.dataset)
+
+    def new(text):
+        return preprocessor.extract_features(text)
+
+    def old(text):
+        return legacy_extract_features(preprocessor, text)
+
+    keys = list(old(texts[next(iter(texts))][0]).keys()) if texts else []
+    mismatches = sum(
+        1 for language_texts in texts.values() for text in language_texts
+        if any(new(text)[key] != old(text)[key] for key in keys)
+    )
+
+    print(f"{'language':<10}{'texts':>7}{'old (us)':>12}{'new (us)':>12}{'speedup':>10}")
+    for language, language_texts in sorted(texts.items()):
+        if not language_texts:
+            continue
+        old_us, new_us = time_per_text([old, new], language_texts, args.rounds)
+        print(f"{language:<10}{len(language_texts):>7}{old_us:>12.1f}{new_us:>12.1f}{old_us / new_us:>9.2f}x")
+
+    print(f"\n✅ Feature mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: Banglish spelling correction
+Replays the words of Banglish complaints in complaints_dataset.json that reach
+the fuzzy-match step of convert_banglish_to_bangla, and compares
+difflib.get_close_matches (old) with FuzzyIndex (new): per-word latency and
+agreement of the returned corrections.
+
+Usage: python bench_fuzzy.py [--limit 200]
+"""
+
+import argparse
+import difflib
+import json
+import re
+import time
+
+from banglish_dict import BANGLISH_TO_BN
+from fuzzy_index import FuzzyIndex
+
+
+def fuzzy_words(dataset_path: str) -> list:
+    """Distinct words that miss the direct dictionary lookup and get fuzzy-matched"""
+    with open(dataset_path, 'r', encoding='utf-8') as f:
+        complaints = json.load(f)
+
+    words = set()
+    for complaint in complaints:
+        if complaint.get('language') != 'banglish':
+            continue
+        for word in complaint['description'].split():
+            word_lower = word.lower()
+            if word_lower in BANGLISH_TO_BN:
+                continue
+            if re.match(r'[ঀ-৿]', word) or re.match(r'[0-9]', word):
+                continue
+            if len(word) >= 3:
+                words.add(word_lower)
+    return sorted(words)
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def time_per_word(match, words: list) -> tuple:
+    results, timings = [], []
+    for word in words:
+        start = time.perf_counter()
+        results.append(match(word))
+        timings.append((time.perf_counter() - start) * 1000)
+    return results, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Banglish fuzzy matching")
+    parser.add_argument('--dataset', default='complaints_dataset.json')
+    parser.add_argument('--limit', type=int, default=200, help="words to time with difflib (it is slow)")
+    args = parser.parse_args()
+
+    words = fuzzy_words(args.dataset)
+    keys = list(BANGLISH_TO_BN.keys())
+    print(f"📊 {len(words)} distinct fuzzy-matched words, {len(keys)} dictionary keys")
+
+    start = time.perf_counter()
+    index = FuzzyIndex(keys, cutoff=0.85)
+    print(f"🔨 Index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    sample = words[:args.limit]
+
+    def old(word):
+        matches = difflib.get_close_matches(word, keys, n=1, cutoff=0.85)
+        return matches[0] if matches else None
+
+    old_results, old_times = time_per_word(old, sample)
+    new_results, new_times = time_per_word(index.best_match, sample)
+    agree = sum(1 for a, b in zip(old_results, new_results) if a == b)
+
+    print(f"\n{'matcher':<12}{'mean (ms)':>12}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for name, timings in [('difflib', old_times), ('FuzzyIndex', new_times)]:
+        mean = sum(timings) / len(timings)
+        print(f"{name:<12}{mean:>12.3f}{percentile(timings, 0.5):>12.3f}{percentile(timings, 0.95):>12.3f}")
+
+    print(f"\n✅ Same correction for {agree}/{len(sample)} words")
+    print(f"⚡ Speedup: {sum(old_times) / max(sum(new_times), 1e-9):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
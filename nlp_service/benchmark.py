@@ -0,0 +1,396 @@
+"""
+Benchmark: NLP service throughput and latency
+Replays complaints_dataset.json (or a generated .jsonl, see --limit) per language bucket through the pipeline and
+reports p50/p95/p99 latency, throughput and peak RSS, in up to three modes:
+
+    inprocess    TextPreprocessor + ComplaintClassifier, one complaint at a time.
+                 Each bucket runs in a fresh interpreter so peak RSS is per bucket.
+    http-single  POST /api/analyze-complaint at --concurrency
+    http-batch   POST /api/batch-analyze with --batch-size complaints per request
+
+Results (with commit, settings and dataset hash) are written as JSON so runs
+can be compared across commits; --compare prints the deltas against an older
+file and exits non-zero when p95 latency or throughput regress beyond
+--max-regression percent.
+
+For HTTP modes, start the service with RESULT_CACHE_SIZE=0 (repeated passes
+would otherwise be served from the result cache; hits are reported) and pass
+--server-pid to record the server's peak RSS. The peak is reset before each
+bucket (/proc/<pid>/clear_refs) so it is per bucket; where that is not
+permitted the server's lifetime peak is reported and marked with '*'.
+
+Usage: python benchmark.py [--modes inprocess http-single http-batch]
+                           [--concurrency 8] [--repeat 1] [--output bench.json]
+                           [--compare previous.json]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+MODES = ['inprocess', 'http-single', 'http-batch']
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of sorted values"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(latencies_ms: List[float], complaints: int, wall_s: float, errors: int = 0,
+              peak_rss_kb: Optional[int] = None, **extra) -> Dict:
+    values = sorted(latencies_ms)
+    summary = {
+        'requests': len(values),
+        'complaints': complaints,
+        'errors': errors,
+        'p50_ms': round(percentile(values, 50), 3),
+        'p95_ms': round(percentile(values, 95), 3),
+        'p99_ms': round(percentile(values, 99), 3),
+        'mean_ms': round(sum(values) / len(values), 3) if values else 0.0,
+        'max_ms': round(values[-1], 3) if values else 0.0,
+        'throughput_per_s': round(complaints / wall_s, 2) if wall_s > 0 else 0.0,
+        'wall_s': round(wall_s, 3),
+        'peak_rss_mb': round(peak_rss_kb / 1024, 1) if peak_rss_kb else None
+    }
+    summary.update(extra)
+    return summary
+
+
+def combine(buckets: Dict[str, Dict], samples: Dict[str, List[float]]) -> Dict:
+    """'all' bucket: pooled latencies, total throughput over the summed wall time"""
+    latencies = [value for bucket_samples in samples.values() for value in bucket_samples]
+    rss = [b['peak_rss_mb'] for b in buckets.values() if b.get('peak_rss_mb')]
+    summary = summarize(
+        latencies,
+        sum(b['complaints'] for b in buckets.values()),
+        sum(b['wall_s'] for b in buckets.values()),
+        sum(b['errors'] for b in buckets.values())
+    )
+    summary['peak_rss_mb'] = max(rss) if rss else None
+    return summary
+
+
+def _read_complaints(dataset_path: str):
+    """A JSON array, or JSONL read line by line (large generated datasets)"""
+    with open(dataset_path, 'r', encoding='utf-8') as f:
+        if not dataset_path.endswith('.jsonl'):
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_buckets(dataset_path: str, languages: Optional[List[str]],
+                 limit: Optional[int] = None) -> Dict[str, List[str]]:
+    """Descriptions per language; `limit` caps each bucket (stops reading once all are full)"""
+    buckets = defaultdict(list)
+    wanted = set(languages) if languages else None
+    for complaint in _read_complaints(dataset_path):
+        language = complaint.get('language', 'unknown')
+        if not complaint.get('description') or (wanted and language not in wanted):
+            continue
+        bucket = buckets[language]
+        if limit and len(bucket) >= limit:
+            if wanted and all(len(buckets[name]) >= limit for name in wanted):
+                break
+            continue
+        bucket.append(complaint['description'])
+    return dict(sorted(buckets.items()))
+
+
+def reset_server_peak(pid: Optional[int]) -> bool:
+    """Reset the server's VmHWM to its current RSS; False if not permitted"""
+    if not pid:
+        return False
+    try:
+        with open(f'/proc/{pid}/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def server_memory_kb(pid: Optional[int]) -> Optional[int]:
+    """Peak RSS (VmHWM) of the server process, if its pid is known"""
+    if not pid:
+        return None
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# In-process mode
+
+def _inprocess_bucket(texts: List[str], repeat: int, warmup: int) -> Dict:
+    """Runs in a fresh interpreter: load the pipeline, time each complaint"""
+    sys.path.insert(0, DIRECTORY)
+    started = time.perf_counter()
+    from preprocessor import TextPreprocessor
+    from classifier import ComplaintClassifier
+    preprocessor = TextPreprocessor()
+    classifier = ComplaintClassifier()
+
+    def analyze(text):
+        context, features = preprocessor.prepare(text)
+        classifier.analyze_complaint(context.text, features, context=context)
+
+    for text in texts[:warmup]:
+        analyze(text)
+    startup_s = time.perf_counter() - started
+
+    latencies, errors = [], 0
+    wall_start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            try:
+                analyze(text)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+    wall_s = time.perf_counter() - wall_start
+
+    return {
+        'latencies': latencies,
+        'errors': errors,
+        'wall_s': wall_s,
+        'startup_s': startup_s,
+        # ru_maxrss is in KB on Linux
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def run_inprocess(buckets: Dict[str, List[str]], args) -> Dict:
+    ctx = multiprocessing.get_context('spawn')
+    results, samples = {}, {}
+    for language, texts in buckets.items():
+        with ctx.Pool(1) as pool:
+            run = pool.apply(_inprocess_bucket, (texts, args.repeat, args.warmup))
+        samples[language] = run['latencies']
+        results[language] = summarize(
+            run['latencies'], len(run['latencies']), run['wall_s'], run['errors'],
+            run['peak_rss_kb'], startup_s=round(run['startup_s'], 3)
+        )
+        print(f"  inprocess {language:<10} p95 {results[language]['p95_ms']:>8.2f} ms  "
+              f"{results[language]['throughput_per_s']:>9.1f}/s")
+    results['all'] = combine(results, samples)
+    return results
+
+
+# HTTP modes
+
+async def _replay(client, requests: List[tuple], concurrency: int) -> Dict:
+    """Send (path, payload, complaint count) requests with `concurrency` workers"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    latencies, counters = [], {'errors': 0, 'complaints': 0, 'cache_hits': 0}
+
+    async def worker():
+        while not queue.empty():
+            path, payload, count = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                response.raise_for_status()
+            except Exception:
+                counters['errors'] += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            counters['complaints'] += count
+            if path.endswith('analyze-complaint') and response.json().get('cached'):
+                counters['cache_hits'] += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {'latencies': latencies, 'wall_s': time.perf_counter() - wall_start, **counters}
+
+
+def _requests_for(mode: str, texts: List[str], batch_size: int) -> List[tuple]:
+    if mode == 'http-single':
+        return [('/api/analyze-complaint', {'complaint_text': text}, 1) for text in texts]
+    return [
+        ('/api/batch-analyze', [{'complaint_text': text} for text in texts[i:i + batch_size]],
+         len(texts[i:i + batch_size]))
+        for i in range(0, len(texts), batch_size)
+    ]
+
+
+async def run_http(mode: str, buckets: Dict[str, List[str]], args) -> Dict:
+    import httpx
+
+    results, samples = {}, {}
+    rss_scope = None
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, headers={'X-API-Key': args.api_key},
+                                 timeout=args.timeout, limits=limits) as client:
+        for language, texts in buckets.items():
+            if args.warmup:
+                await _replay(client, _requests_for(mode, texts[:args.warmup], args.batch_size), args.concurrency)
+            # Without a reset VmHWM still holds the peaks of earlier buckets and modes
+            if args.server_pid:
+                rss_scope = 'bucket' if reset_server_peak(args.server_pid) else 'server_lifetime'
+            run = await _replay(client, _requests_for(mode, texts * args.repeat, args.batch_size), args.concurrency)
+            samples[language] = run['latencies']
+            results[language] = summarize(
+                run['latencies'], run['complaints'], run['wall_s'], run['errors'],
+                server_memory_kb(args.server_pid), cache_hits=run['cache_hits'],
+                rss_scope=rss_scope
+            )
+            print(f"  {mode} {language:<10} p95 {results[language]['p95_ms']:>8.2f} ms  "
+                  f"{results[language]['throughput_per_s']:>9.1f}/s  errors {run['errors']}")
+            if run['cache_hits']:
+                print(f"  ⚠️ {run['cache_hits']} responses came from the result cache (run the service with RESULT_CACHE_SIZE=0)")
+    results['all'] = combine(results, samples)
+    # The max of the per-bucket peaks, so it has their scope
+    results['all']['rss_scope'] = rss_scope
+    return results
+
+
+# Metadata and comparison
+
+def git_revision() -> Dict:
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=DIRECTORY, capture_output=True, text=True).stdout.strip()
+    try:
+        return {'commit': git('rev-parse', 'HEAD') or None, 'dirty': bool(git('status', '--porcelain', '--', '.'))}
+    except OSError:
+        return {'commit': None, 'dirty': None}
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def metadata(args) -> Dict:
+    return {
+        **git_revision(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'nlp_mode': os.getenv('NLP_MODE', 'full'),
+        'inference_backend': os.getenv('INFERENCE_BACKEND', 'torch'),
+        'dataset': os.path.basename(args.dataset),
+        'dataset_sha256': file_sha256(args.dataset),
+        'limit': args.limit,
+        'modes': args.modes,
+        'repeat': args.repeat,
+        'warmup': args.warmup,
+        'concurrency': args.concurrency,
+        'batch_size': args.batch_size,
+        'url': args.url if any(mode.startswith('http') for mode in args.modes) else None
+    }
+
+
+def compare(current: Dict, previous: Dict, max_regression: float) -> bool:
+    """Print per-bucket deltas; True when nothing regressed beyond max_regression %"""
+    print(f"\n📊 Compared with {previous['meta'].get('commit') or 'previous run'}")
+    print(f"{'mode':<13}{'bucket':<10}{'p50 (ms)':>18}{'p95 (ms)':>18}{'p99 (ms)':>18}{'per second':>20}")
+    ok = True
+    for mode, buckets in current['results'].items():
+        for bucket, now in buckets.items():
+            before = previous.get('results', {}).get(mode, {}).get(bucket)
+            if not before:
+                continue
+            cells = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_per_s'):
+                change = (now[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+                cells.append(f"{now[key]:.2f} ({change:+.1f}%)")
+                # Higher latency or lower throughput is a regression
+                worse = change if key != 'throughput_per_s' else -change
+                if key in ('p95_ms', 'throughput_per_s') and worse > max_regression:
+                    ok = False
+            print(f"{mode:<13}{bucket:<10}" + ''.join(f"{cell:>18}" if i < 3 else f"{cell:>20}"
+                                                        for i, cell in enumerate(cells)))
+    print("✅ No regressions" if ok else f"❌ Regression above {max_regression}% (p95 or throughput)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NLP pipeline latency and throughput per language")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=['inprocess'])
+    parser.add_argument('--dataset', default=os.path.join(DIRECTORY, 'complaints_dataset.json'))
+    parser.add_argument('--languages', nargs='+', help="only these language buckets")
+    parser.add_argument('--limit', type=int, help="at most this many complaints per language bucket")
+    parser.add_argument('--repeat', type=int, default=1, help="passes over each bucket")
+    parser.add_argument('--warmup', type=int, default=10, help="unmeasured complaints per bucket first")
+    parser.add_argument('--concurrency', type=int, default=8, help="HTTP requests in flight")
+    parser.add_argument('--batch-size', type=int, default=16, help="complaints per /api/batch-analyze request")
+    parser.add_argument('--url', default=os.getenv('NLP_SERVICE_URL', 'http://localhost:8001'))
+    parser.add_argument('--api-key', default=os.getenv('API_KEY', 'your-secret-api-key'))
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--server-pid', type=int, help="service pid, to record its peak RSS")
+    parser.add_argument('--output', help="write results JSON here")
+    parser.add_argument('--compare', help="previous results JSON to compare against")
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help="percent of p95/throughput regression that fails --compare")
+    args = parser.parse_args()
+
+    buckets = load_buckets(args.dataset, args.languages, args.limit)
+    print(f"🚀 Benchmarking {sum(len(t) for t in buckets.values())} complaints "
+          f"({', '.join(f'{k}: {len(v)}' for k, v in buckets.items())}) x{args.repeat}")
+
+    report = {'meta': metadata(args), 'results': {}}
+    for mode in args.modes:
+        if mode == 'inprocess':
+            report['results'][mode] = run_inprocess(buckets, args)
+        else:
+            report['results'][mode] = asyncio.run(run_http(mode, buckets, args))
+
+    lifetime_peaks = False
+    print(f"\n{'mode':<13}{'bucket':<10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'per second':>12}{'peak RSS (MB)':>15}{'errors':>8}")
+    for mode, results in report['results'].items():
+        for bucket, r in results.items():
+            rss = f"{r['peak_rss_mb']:.1f}" if r['peak_rss_mb'] else '-'
+            if r['peak_rss_mb'] and r.get('rss_scope') == 'server_lifetime':
+                rss += '*'
+                lifetime_peaks = True
+            print(f"{mode:<13}{bucket:<10}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                  f"{r['throughput_per_s']:>12.1f}{rss:>15}{r['errors']:>8}")
+    if lifetime_peaks:
+        print("* server lifetime peak (could not reset it per bucket), includes earlier buckets and modes")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if not compare(report, previous, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
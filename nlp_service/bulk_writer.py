@@ -0,0 +1,233 @@
+"""
+Bulk Result Writer
+Writes AI analysis results back to Postgres in chunks: rows are streamed into
+a temporary staging table with COPY and applied with one UPDATE ... FROM per
+chunk, instead of one UPDATE round trip per complaint.
+"""
+
+import io
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from psycopg2 import sql
+from psycopg2.extras import Json
+
+from config import config
+
+
+def _array_literal(items: Sequence[Any]) -> str:
+    """Postgres array literal, e.g. ['a', None] -> {"a",NULL}"""
+    parts = []
+    for item in items:
+        if item is None:
+            parts.append('NULL')
+        elif isinstance(item, (list, tuple)):
+            parts.append(_array_literal(item))
+        else:
+            if isinstance(item, bool):
+                item = 't' if item else 'f'
+            text = str(item).replace('\\', '\\\\').replace('"', '\\"')
+            parts.append(f'"{text}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def copy_field(value: Any, data_type: str) -> str:
+    """Encode one value for COPY ... FROM STDIN (text format)"""
+    if value is None:
+        return '\\N'
+
+    if data_type in ('json', 'jsonb'):
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, bool):
+        text = 't' if value else 'f'
+    elif isinstance(value, (list, tuple)):
+        text = _array_literal(value)
+    elif isinstance(value, dict):
+        text = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (datetime, date)):
+        text = value.isoformat()
+    else:
+        text = str(value)
+
+    return (text.replace('\\', '\\\\')
+                .replace('\t', '\\t')
+                .replace('\n', '\\n')
+                .replace('\r', '\\r'))
+
+
+class BulkResultWriter:
+    def __init__(self, conn, table: str, columns: List[str], key_column: str = 'id',
+                 expressions: Optional[Dict[str, str]] = None,
+                 chunk_size: Optional[int] = None, commit_every: Optional[int] = None,
+                 auto_commit: bool = True):
+        """
+        columns: columns filled from the values passed to add(), in that order
+        expressions: columns set to a constant SQL expression, e.g. {'ai_analysis_date': 'NOW()'}
+        chunk_size: rows per COPY + UPDATE
+        commit_every: chunks per commit
+        auto_commit: False leaves commits to the caller (e.g. to commit a checkpoint atomically with the rows)
+        """
+        self.conn = conn
+        self.table = table
+        self.columns = list(columns)
+        self.key_column = key_column
+        self.expressions = expressions or {}
+        self.chunk_size = max(1, chunk_size or config.WRITE_CHUNK_SIZE)
+        self.commit_every = max(1, commit_every or config.WRITE_COMMIT_EVERY)
+        self.auto_commit = auto_commit
+
+        self.rows_written = 0
+        self.chunks = 0
+        self.commits = 0
+        self.failed_keys: List[Any] = []
+
+        self._buffer: Dict[Any, Sequence[Any]] = {}
+        self._uncommitted_chunks = 0
+        self._staging = f"_bulk_{table}"
+        self._data_types = self._load_data_types()
+        self._create_staging()
+
+    def _load_data_types(self) -> Dict[str, str]:
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = %s",
+                (self.table,)
+            )
+            data_types = {name: data_type for name, data_type in cur.fetchall()}
+
+        missing = [c for c in [self.key_column] + self.columns if c not in data_types]
+        if missing:
+            raise ValueError(f"Columns not found in {self.table}: {', '.join(missing)}")
+        return data_types
+
+    def _create_staging(self):
+        """Temp table with the key and value columns' types (no constraints)"""
+        staging = sql.Identifier(self._staging)
+        with self.conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(staging))
+            cur.execute(
+                sql.SQL("CREATE TEMP TABLE {} AS SELECT {} FROM {} WITH NO DATA").format(
+                    staging,
+                    sql.SQL(', ').join(map(sql.Identifier, [self.key_column] + self.columns)),
+                    sql.Identifier(self.table)
+                )
+            )
+        # Committed right away so a later rollback can't drop it
+        self.conn.commit()
+
+    def _set_clause(self, source: Optional[str]) -> sql.Composable:
+        """SET list: value columns from `source` (or placeholders), then expressions"""
+        assignments = [
+            sql.SQL("{} = {}").format(
+                sql.Identifier(column),
+                sql.SQL("s.{}").format(sql.Identifier(column)) if source else sql.Placeholder()
+            )
+            for column in self.columns
+        ]
+        assignments += [
+            sql.SQL("{} = {}").format(sql.Identifier(column), sql.SQL(expression))
+            for column, expression in self.expressions.items()
+        ]
+        return sql.SQL(', ').join(assignments)
+
+    def add(self, key: Any, values: Sequence[Any]):
+        """Queue one row (values in `columns` order); writes a chunk when the buffer is full"""
+        # A key appears once per chunk (UPDATE ... FROM would pick one arbitrarily)
+        self._buffer[key] = values
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def add_many(self, rows: Sequence[Sequence[Any]]):
+        """Queue (key, values) pairs"""
+        for key, values in rows:
+            self.add(key, values)
+
+    def flush(self):
+        """Write the buffered chunk; commits every `commit_every` chunks"""
+        if not self._buffer:
+            return
+        rows = list(self._buffer.items())
+        self._buffer = {}
+
+        with self.conn.cursor() as cur:
+            cur.execute("SAVEPOINT bulk_chunk")
+            try:
+                self._copy_chunk(cur, rows)
+                cur.execute("RELEASE SAVEPOINT bulk_chunk")
+                self.rows_written += len(rows)
+            except Exception as e:
+                # Keep earlier uncommitted chunks; isolate the bad rows one by one
+                cur.execute("ROLLBACK TO SAVEPOINT bulk_chunk")
+                logging.warning(f"⚠️ Bulk write to {self.table} failed ({e}); retrying {len(rows)} rows individually")
+                self._write_rows(cur, rows)
+
+        self.chunks += 1
+        self._uncommitted_chunks += 1
+        if self.auto_commit and self._uncommitted_chunks >= self.commit_every:
+            self.commit()
+
+    def _copy_chunk(self, cur, rows: List[tuple]):
+        data_types = [self._data_types[c] for c in [self.key_column] + self.columns]
+        buffer = io.StringIO()
+        for key, values in rows:
+            fields = [key, *values]
+            buffer.write('\t'.join(copy_field(v, t) for v, t in zip(fields, data_types)))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        staging = sql.Identifier(self._staging)
+        cur.execute(sql.SQL("TRUNCATE {}").format(staging))
+        cur.copy_expert(
+            sql.SQL("COPY {} ({}) FROM STDIN").format(
+                staging, sql.SQL(', ').join(map(sql.Identifier, [self.key_column] + self.columns))
+            ).as_string(cur),
+            buffer
+        )
+        key = sql.Identifier(self.key_column)
+        cur.execute(
+            sql.SQL("UPDATE {} AS t SET {} FROM {} AS s WHERE t.{} = s.{}").format(
+                sql.Identifier(self.table), self._set_clause('s'), staging, key, key
+            )
+        )
+
+    def _write_rows(self, cur, rows: List[tuple]):
+        """Per-row fallback; rows that still fail are skipped and recorded"""
+        update = sql.SQL("UPDATE {} SET {} WHERE {} = %s").format(
+            sql.Identifier(self.table), self._set_clause(None), sql.Identifier(self.key_column)
+        )
+        json_columns = [self._data_types[c] in ('json', 'jsonb') for c in self.columns]
+        for key, values in rows:
+            params = [
+                Json(value) if is_json and value is not None and not isinstance(value, str) else value
+                for value, is_json in zip(values, json_columns)
+            ]
+            cur.execute("SAVEPOINT bulk_row")
+            try:
+                cur.execute(update, (*params, key))
+                cur.execute("RELEASE SAVEPOINT bulk_row")
+                self.rows_written += 1
+            except Exception as e:
+                cur.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                self.failed_keys.append(key)
+                logging.error(f"❌ Error writing {self.key_column}={key} to {self.table}: {e}")
+
+    def commit(self):
+        self.conn.commit()
+        self.commits += 1
+        self._uncommitted_chunks = 0
+
+    def close(self):
+        """Write what is left and commit"""
+        self.flush()
+        if self._uncommitted_chunks:
+            self.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rows_written': self.rows_written,
+            'chunks': self.chunks,
+            'commits': self.commits,
+            'failed': len(self.failed_keys)
+        }
@@ -3,52 +3,111 @@ BanglaBERT-based Complaint Classifier
 Handles validity detection, priority classification, and sentiment analysis
 """
 
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, AutoModel
 import numpy as np
 from typing import Dict, List, Tuple
 from config import config
-import re
+from analysis_context import AnalysisContext
+from keyword_matcher import KeywordMatcher, KeywordHits
+from metrics import timed_stage
+import profiling
+from model_registry import model_registry
+from text_patterns import WORD_VOWEL, SENTENCE_END
 
 class ComplaintClassifier:
     def __init__(self):
-        """Initialize mBERT (Multilingual BERT) model and tokenizer"""
-        print(f"Loading mBERT model: {config.BANGLA_BERT_MODEL}")
-        
-        # Load tokenizer and base model
-        self.tokenizer = AutoTokenizer.from_pretrained(config.BANGLA_BERT_MODEL)
-        self.base_model = AutoModel.from_pretrained(config.BANGLA_BERT_MODEL)
-        
-        # Set device
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.base_model.to(self.device)
-        self.base_model.eval()
-        
-        print(f"Model loaded successfully on {self.device}")
+        """
+        Initialize the classifier
+        mBERT (Multilingual BERT) is loaded lazily by the model registry on first use
+        """
+        # Compile all keyword groups once; each text is scanned a single time
+        self.keyword_matcher = KeywordMatcher.from_config(config)
+    
+    @property
+    def tokenizer(self):
+        return model_registry.get('mbert')['tokenizer']
+    
+    @property
+    def base_model(self):
+        return model_registry.get('mbert')['model']
+    
+    @property
+    def device(self):
+        return model_registry.get('mbert')['device']
+    
+    @property
+    def model_loaded(self) -> bool:
+        return model_registry.is_loaded('mbert')
+    
+    def scan_keywords(self, text: str) -> KeywordHits:
+        """Scan text once for every configured keyword group"""
+        return self.keyword_matcher.scan(text.lower())
+    
+    def scan_keywords_batch(self, texts: List[str]) -> List[KeywordHits]:
+        """Scan a batch of texts for every keyword group in one pass"""
+        return self.keyword_matcher.scan_many([text.lower() for text in texts])
+    
+    def scan_contexts(self, contexts: List[AnalysisContext]):
+        """Fill in the keyword hits of a batch of contexts with one scan"""
+        hits = self.keyword_matcher.scan_many([context.lower for context in contexts])
+        for context, keyword_hits in zip(contexts, hits):
+            context.keyword_hits = keyword_hits
+    
+    def build_context(self, text: str, context: AnalysisContext = None,
+                      keyword_hits: KeywordHits = None) -> AnalysisContext:
+        """Reuse the caller's context for this text (or build one) and make sure it has keyword hits"""
+        if context is None or context.text != text:
+            context = AnalysisContext(text)
+        if keyword_hits is not None:
+            context.keyword_hits = keyword_hits
+        elif context.keyword_hits is None:
+            context.keyword_hits = self.keyword_matcher.scan(context.lower)
+        return context
     
     def get_embedding(self, text: str) -> np.ndarray:
         """Get BERT embedding for text"""
-        # Tokenize
-        inputs = self.tokenizer(
-            text,
-            return_tensors="pt",
-            truncation=True,
-            max_length=config.MAX_LENGTH,
-            padding=True
-        )
-        
-        # Move to device
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-        
-        # Get embeddings
-        with torch.no_grad():
-            outputs = self.base_model(**inputs)
-            # Use [CLS] token embedding
-            embeddings = outputs.last_hidden_state[:, 0, :].cpu().numpy()
-        
-        return embeddings[0]
+        return self.get_embeddings([text])[0]
     
-    def detect_validity(self, text: str, features: Dict) -> Dict:
+    def get_embeddings(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """
+        Get BERT embeddings for many texts as padded mini-batches
+        Texts are sorted by length so each mini-batch pads as little as possible;
+        rows are returned in input order
+        """
+        import torch
+        
+        batch_size = batch_size or config.BATCH_SIZE
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = [None] * len(texts)
+        
+        for start in range(0, len(order), batch_size):
+            chunk = order[start:start + batch_size]
+            
+            # Tokenize (padded to the longest text in this mini-batch)
+            inputs = self.tokenizer(
+                [texts[i] for i in chunk],
+                return_tensors="pt",
+                truncation=True,
+                max_length=config.MAX_LENGTH,
+                padding=True
+            )
+            
+            # Move to device
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            
+            # Get embeddings
+            with torch.no_grad():
+                outputs = self.base_model(**inputs)
+                # Use [CLS] token embedding
+                cls_embeddings = outputs.last_hidden_state[:, 0, :].cpu().numpy()
+            
+            for row, i in enumerate(chunk):
+                embeddings[i] = cls_embeddings[row]
+        
+        return np.stack(embeddings) if embeddings else np.empty((0, 0))
+    
+    @timed_stage('detect_validity')
+    def detect_validity(self, text: str, features: Dict, keyword_hits: KeywordHits = None,
+                        context: AnalysisContext = None) -> Dict:
         """
         Detect if complaint is valid or spam/gibberish
         Returns: validity_score (0-1), is_valid (bool), reason
@@ -56,7 +115,8 @@ class ComplaintClassifier:
         validity_score = 1.0
         reasons = []
         
-        text_lower = text.lower()
+        context = self.build_context(text, context, keyword_hits)
+        keyword_hits = context.keyword_hits
         
         # CRITICAL: Gibberish detection
         # 1. Check for excessive repeated characters
@@ -84,7 +144,7 @@ class ComplaintClassifier:
         # 5. Check for minimal vowels (especially for English text)
         if features.get('has_english') and not features.get('has_bengali'):
             # English text should have vowels
-            vowel_count = len(re.findall(r'[aeiouAEIOU]', text))
+            vowel_count = context.profile['english_vowels']
             vowel_ratio = vowel_count / max(features['char_count'], 1)
             if vowel_ratio < 0.2 and features['char_count'] > 10:
                 validity_score -= 0.5
@@ -105,21 +165,23 @@ class ComplaintClassifier:
         # 8. Check for common words (if English, should have at least one stop word)
         if features.get('language') == 'en' and features['word_count'] > 4:
             common_en = {'the', 'and', 'is', 'to', 'in', 'of', 'it', 'my', 'that', 'was', 'for', 'on', 'at'}
-            has_common = any(w in text_lower.split() for w in common_en)
+            has_common = not common_en.isdisjoint(context.lower_token_set)
             if not has_common:
                 validity_score -= 0.25
                 reasons.append("No common vocabulary found")
 
         # 9. Check for words without vowels (gibberish indicator)
-        words = text_lower.split()
-        words_no_vowels = [w for w in words if len(w) > 2 and not re.search(r'[aeiouy]', w)]
+        words = context.lower_tokens
+        long_words = [w for w in words if len(w) > 2]
+        words_no_vowels = [w for w in long_words if not WORD_VOWEL.search(w)]
+        profiling.count('regex_scans', len(long_words))
         if len(words_no_vowels) > 0:
             validity_score -= 0.2 * len(words_no_vowels)
             reasons.append(f"Contains {len(words_no_vowels)} word(s) without vowels")
 
         # Rule-based checks
         # 8. Check for spam keywords
-        spam_count = sum(1 for keyword in config.SPAM_KEYWORDS if keyword in text_lower)
+        spam_count = keyword_hits.count('spam')
         if spam_count > 0:
             validity_score -= 0.3 * spam_count
             reasons.append(f"Contains {spam_count} spam keyword(s)")
@@ -141,19 +203,13 @@ class ComplaintClassifier:
         
         # POSITIVE indicators
         # 11. Check for product/shop mention (valid complaints usually mention these)
-        context_keywords = [
-            'দোকান', 'shop', 'পণ্য', 'product', 'বিক্রেতা', 'seller',
-            'কিনেছি', 'bought', 'purchased', 'খাবার', 'food', 'চাল', 'rice',
-            'ডাল', 'lentil', 'তেল', 'oil', 'দাম', 'price', 'টাকা', 'taka',
-            'ওজন', 'weight', 'মান', 'quality', 'সমস্যা', 'problem'
-        ]
-        context_count = sum(1 for word in context_keywords if word in text_lower)
+        context_count = keyword_hits.count('context')
         if context_count > 0:
             validity_score += min(0.3, context_count * 0.1)
             reasons.append(f"Contains {context_count} relevant context keyword(s)")
         
         # 12. Proper sentence structure (has periods or Bengali danda)
-        has_structure = bool(re.search(r'[।.!?]', text))
+        has_structure = context.has_sentence_end
         if has_structure and features['word_count'] > 5:
             validity_score += 0.1
             reasons.append("Proper sentence structure")
@@ -171,23 +227,25 @@ class ComplaintClassifier:
             'confidence': 'high' if abs(validity_score - 0.5) > 0.3 else 'medium'
         }
     
-    def classify_priority(self, text: str, features: Dict, category: str = None) -> Dict:
+    @timed_stage('classify_priority')
+    def classify_priority(self, text: str, features: Dict, category: str = None,
+                          keyword_hits: KeywordHits = None, context: AnalysisContext = None) -> Dict:
         """
         Classify complaint priority: Urgent, High, Medium, Low
         """
         priority_score = 0.5  # Start with Medium
         reasons = []
         
-        text_lower = text.lower()
+        keyword_hits = self.build_context(text, context, keyword_hits).keyword_hits
         
         # 1. Check for urgent keywords
-        urgent_count = sum(1 for keyword in config.PRIORITY_KEYWORDS['urgent'] if keyword in text_lower)
+        urgent_count = keyword_hits.count('priority.urgent')
         if urgent_count > 0:
             priority_score += 0.3
             reasons.append(f"Contains {urgent_count} urgent keyword(s)")
         
         # 2. Check for high priority keywords
-        high_count = sum(1 for keyword in config.PRIORITY_KEYWORDS['high'] if keyword in text_lower)
+        high_count = keyword_hits.count('priority.high')
         if high_count > 0:
             priority_score += 0.2
             reasons.append(f"Health/safety related ({high_count} keywords)")
@@ -228,29 +286,31 @@ class ComplaintClassifier:
             'confidence': 'high' if abs(priority_score - 0.5) > 0.3 else 'medium'
         }
     
-    def detect_severity(self, text: str, features: Dict, category: str = None) -> Dict:
+    @timed_stage('detect_severity')
+    def detect_severity(self, text: str, features: Dict, category: str = None,
+                        keyword_hits: KeywordHits = None, context: AnalysisContext = None) -> Dict:
         """
         Detect severity of complaint: Critical, Major, Moderate, Minor
         """
         severity_score = 0.5  # Start with Moderate
         reasons = []
         
-        text_lower = text.lower()
+        keyword_hits = self.build_context(text, context, keyword_hits).keyword_hits
         
         # 1. Check for critical keywords
-        critical_count = sum(1 for keyword in config.SEVERITY_KEYWORDS['critical'] if keyword in text_lower)
+        critical_count = keyword_hits.count('severity.critical')
         if critical_count > 0:
             severity_score += 0.3
             reasons.append(f"Critical situation ({critical_count} keywords)")
         
         # 2. Check for major keywords
-        major_count = sum(1 for keyword in config.SEVERITY_KEYWORDS['major'] if keyword in text_lower)
+        major_count = keyword_hits.count('severity.major')
         if major_count > 0:
             severity_score += 0.2
             reasons.append(f"Major issue ({major_count} keywords)")
         
         # 3. Check for moderate keywords
-        moderate_count = sum(1 for keyword in config.SEVERITY_KEYWORDS['moderate'] if keyword in text_lower)
+        moderate_count = keyword_hits.count('severity.moderate')
         if moderate_count > 0:
             severity_score += 0.1
             reasons.append(f"Moderate issue ({moderate_count} keywords)")
@@ -267,15 +327,13 @@ class ComplaintClassifier:
             reasons.append(f"Major category: {category}")
         
         # 5. Health-related terms boost severity
-        health_terms = ['স্বাস্থ্য', 'health', 'অসুস্থ', 'sick', 'হাসপাতাল', 'hospital', 'ডাক্তার', 'doctor']
-        health_count = sum(1 for term in health_terms if term in text_lower)
+        health_count = keyword_hits.count('health')
         if health_count > 0:
             severity_score += 0.15
             reasons.append(f"Health impact mentioned ({health_count} terms)")
         
         # 6. Financial loss indicators
-        financial_terms = ['ক্ষতি', 'loss', 'টাকা', 'taka', 'money', 'refund']
-        financial_count = sum(1 for term in financial_terms if term in text_lower)
+        financial_count = keyword_hits.count('financial')
         if financial_count > 0:
             severity_score += 0.05
             reasons.append(f"Financial impact ({financial_count} terms)")
@@ -300,7 +358,9 @@ class ComplaintClassifier:
             'confidence': 'high' if abs(severity_score - 0.5) > 0.3 else 'medium'
         }
     
-    def analyze_sentiment(self, text: str, features: Dict) -> Dict:
+    @timed_stage('analyze_sentiment')
+    def analyze_sentiment(self, text: str, features: Dict, keyword_hits: KeywordHits = None,
+                          context: AnalysisContext = None) -> Dict:
         """
         Analyze sentiment: Positive, Negative, Neutral
         For complaints, most will be negative, but we can detect severity
@@ -308,23 +368,16 @@ class ComplaintClassifier:
         sentiment_score = -0.5  # Complaints are generally negative
         reasons = []
         
-        text_lower = text.lower()
+        keyword_hits = self.build_context(text, context, keyword_hits).keyword_hits
         
         # Negative indicators
-        negative_words = [
-            'খারাপ', 'bad', 'ভয়ানক', 'terrible', 'নষ্ট', 'damaged',
-            'রাগ', 'angry', 'ক্ষতি', 'loss', 'প্রতারণা', 'fraud'
-        ]
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        negative_count = keyword_hits.count('sentiment.negative')
         if negative_count > 0:
             sentiment_score -= 0.1 * negative_count
             reasons.append(f"{negative_count} negative word(s)")
         
         # Positive indicators (might be sarcasm or comparison)
-        positive_words = [
-            'ভালো', 'good', 'সন্তুষ্ট', 'satisfied', 'ধন্যবাদ', 'thanks'
-        ]
-        positive_count = sum(1 for word in positive_words if word in text_lower)
+        positive_count = keyword_hits.count('sentiment.positive')
         if positive_count > 0:
             sentiment_score += 0.15 * positive_count
             reasons.append(f"{positive_count} positive word(s)")
@@ -352,15 +405,17 @@ class ComplaintClassifier:
             'reasons': reasons
         }
     
-    def detect_category(self, text: str) -> Dict:
+    @timed_stage('detect_category')
+    def detect_category(self, text: str, keyword_hits: KeywordHits = None,
+                        context: AnalysisContext = None) -> Dict:
         """
         Detect complaint category based on keywords
         """
-        text_lower = text.lower()
+        keyword_hits = self.build_context(text, context, keyword_hits).keyword_hits
         category_scores = {}
         
-        for category, keywords in config.CATEGORY_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
+        for category in config.CATEGORY_KEYWORDS:
+            score = keyword_hits.count(f'category.{category}')
             if score > 0:
                 category_scores[category] = score
         
@@ -382,12 +437,16 @@ class ComplaintClassifier:
             'all_categories': category_scores
         }
     
-    def generate_summary(self, text: str, max_length: int = 500) -> str:
+    @timed_stage('generate_summary')
+    def generate_summary(self, text: str, max_length: int = 500, context: AnalysisContext = None) -> str:
         """
         Generate a summary of the complaint
         Returns the full description without truncation
         """
-        sentences = re.split(r'[।.!?]', text)
+        if context is not None and context.text == text:
+            sentences = context.sentences
+        else:
+            sentences = SENTENCE_END.split(text)
         sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
         
         if not sentences:
@@ -403,31 +462,35 @@ class ComplaintClassifier:
         
         return summary
     
-    def analyze_complaint(self, text: str, features: Dict) -> Dict:
+    def analyze_complaint(self, text: str, features: Dict, keyword_hits: KeywordHits = None,
+                          context: AnalysisContext = None) -> Dict:
         """
         Complete complaint analysis pipeline
         """
+        # 0. One context (lowered text, tokens, keyword scan) shared by all detectors
+        context = self.build_context(text, context, keyword_hits)
+        
         # 1. Validity detection
-        validity_result = self.detect_validity(text, features)
+        validity_result = self.detect_validity(text, features, context=context)
         
         # 2. Category detection
-        category_result = self.detect_category(text)
+        category_result = self.detect_category(text, context=context)
         
         # 3. Priority classification
         priority_result = self.classify_priority(
-            text, features, category_result['category']
+            text, features, category_result['category'], context=context
         )
         
         # 4. Severity detection (NEW)
         severity_result = self.detect_severity(
-            text, features, category_result['category']
+            text, features, category_result['category'], context=context
         )
         
         # 5. Sentiment analysis
-        sentiment_result = self.analyze_sentiment(text, features)
+        sentiment_result = self.analyze_sentiment(text, features, context=context)
         
         # 6. Generate summary
-        summary = self.generate_summary(text)
+        summary = self.generate_summary(text, context=context)
         
         # Compile all results
         return {
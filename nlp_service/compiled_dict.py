@@ -0,0 +1,120 @@
+"""
+Compiled String Dictionary
+Read-only str -> str mapping stored in a memory-mapped binary file.
+Lookups hash into an on-disk open-addressing table, so nothing is parsed at
+load time and every process mapping the file shares the same pages.
+
+File layout (little-endian):
+    header  : magic(8s) count(I) slot_count(I) heap_offset(I)
+    table   : slot_count x heap offset (I), 0 = empty slot
+    heap    : entries sorted by key, each key_len(H) value_len(H) key value (UTF-8)
+"""
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from collections.abc import Mapping
+from typing import Dict, Iterator
+
+MAGIC = b'BNDICT01'
+HEADER = struct.Struct('<8sIII')
+SLOT = struct.Struct('<I')
+ENTRY = struct.Struct('<HH')
+
+
+def write_compiled_dict(data: Dict[str, str], path: str) -> int:
+    """Write data to path in compiled format (atomically). Returns entry count."""
+    entries = sorted((k.encode('utf-8'), v.encode('utf-8')) for k, v in data.items())
+
+    slot_count = 1
+    while slot_count < len(entries) * 2:  # load factor <= 0.5
+        slot_count *= 2
+    heap_offset = HEADER.size + SLOT.size * slot_count
+
+    table = [0] * slot_count
+    heap = bytearray()
+    mask = slot_count - 1
+    for key, value in entries:
+        offset = heap_offset + len(heap)
+        heap += ENTRY.pack(len(key), len(value)) + key + value
+
+        slot = zlib.crc32(key) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = offset
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(entries), slot_count, heap_offset))
+        f.write(struct.pack(f'<{slot_count}I', *table))
+        f.write(heap)
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+class CompiledDict(Mapping):
+    """Memory-mapped view of a file written by write_compiled_dict"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count, self._slot_count, self._heap_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled dictionary")
+        self._mask = self._slot_count - 1
+
+        # Slot table as an array view (no per-probe struct unpacking)
+        table = memoryview(self._mm)[HEADER.size:self._heap_offset]
+        self._table = table.cast('I') if sys.byteorder == 'little' and SLOT.size == 4 else None
+
+    def _find(self, key: bytes) -> int:
+        """Heap offset of key's entry, or 0 if absent"""
+        mm = self._mm
+        table = self._table
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            if table is not None:
+                offset = table[slot]
+            else:
+                offset = SLOT.unpack_from(mm, HEADER.size + SLOT.size * slot)[0]
+            if not offset:
+                return 0
+            key_len = mm[offset] | (mm[offset + 1] << 8)
+            start = offset + ENTRY.size
+            if key_len == len(key) and mm[start:start + key_len] == key:
+                return offset
+            slot = (slot + 1) & self._mask
+
+    def __getitem__(self, key: str) -> str:
+        offset = self._find(key.encode('utf-8')) if isinstance(key, str) else 0
+        if not offset:
+            raise KeyError(key)
+        key_len, value_len = ENTRY.unpack_from(self._mm, offset)
+        start = offset + ENTRY.size + key_len
+        return self._mm[start:start + value_len].decode('utf-8')
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self._find(key.encode('utf-8')) != 0
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self) -> Iterator[str]:
+        """Keys in sorted order (walks the heap sequentially)"""
+        mm = self._mm
+        offset = self._heap_offset
+        for _ in range(self._count):
+            key_len, value_len = ENTRY.unpack_from(mm, offset)
+            start = offset + ENTRY.size
+            yield mm[start:start + key_len].decode('utf-8')
+            offset = start + key_len + value_len
+
+    def __len__(self) -> int:
+        return self._count
@@ -15,9 +15,61 @@ class Config:
     
     # Model Configuration
     BANGLA_BERT_MODEL = os.getenv("MODEL_NAME", "bert-base-multilingual-cased")
+    BANGLISHBERT_MODEL = os.getenv("BANGLISHBERT_MODEL", "csebuetnlp/banglishbert")
     MAX_LENGTH = int(os.getenv("MAX_LENGTH", 512))
     BATCH_SIZE = int(os.getenv("BATCH_SIZE", 8))
     
+    # Model Loading
+    # NLP_MODE=rules runs the keyword/rule pipeline only and never loads transformer weights
+    RULES_ONLY = os.getenv("NLP_MODE", "full").lower() == "rules"
+    # Load the models the service calls (model_registry.SERVICE_MODELS) in the
+    # background after startup instead of on first use
+    MODEL_WARMUP = os.getenv("MODEL_WARMUP", "false").lower() == "true"
+    
+    # Inference backend for mBERT and BanglishBERT: "torch" (reference) or "onnx"
+    # (ONNX Runtime, int8 models written by export_onnx.py)
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_models"))
+    
+    # Translation Caches (Banglish -> Bengali)
+    TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", 10000))
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 50000))
+    # SQLite file for the persistent sentence tier; empty disables it
+    TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", "")
+    # Analysis results of repeated submissions (keyed on cleaned text hash + pipeline version)
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 1024))
+    # Seconds a cached result stays valid; 0 = until evicted
+    RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 3600))
+    # SQLite file shared by all service workers; empty disables the shared tier
+    RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "")
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 100000))
+    
+    # BanglishBERT Generation
+    TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", BATCH_SIZE))
+    # 1 = greedy decoding (fastest), >1 = beam search
+    TRANSLATION_NUM_BEAMS = int(os.getenv("TRANSLATION_NUM_BEAMS", 5))
+    # Output budget per bucket: ratio * longest input, at least the minimum
+    TRANSLATION_MAX_NEW_TOKENS_RATIO = float(os.getenv("TRANSLATION_MAX_NEW_TOKENS_RATIO", 1.5))
+    TRANSLATION_MIN_NEW_TOKENS = int(os.getenv("TRANSLATION_MIN_NEW_TOKENS", 16))
+    
+    # Pre-forked serving (serve.py): worker processes sharing the listening socket
+    # and the models loaded by the parent; 0 = one per CPU
+    SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", 0))
+    # torch intra-op threads per worker; 0 = CPUs divided by workers
+    TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", 0))
+    SERVE_BACKLOG = int(os.getenv("SERVE_BACKLOG", 2048))
+    
+    # Inference Executor (blocking work runs off the event loop)
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 2))
+    INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", 32))
+    
+    # Micro-batching of single-complaint requests. Off by default: the analysis
+    # pipeline runs no model stage that batching could amortize, so every
+    # request would only wait out the window
+    MICRO_BATCH_ENABLED = os.getenv("MICRO_BATCH_ENABLED", "false").lower() == "true"
+    MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", BATCH_SIZE))
+    MICRO_BATCH_WINDOW_MS = float(os.getenv("MICRO_BATCH_WINDOW_MS", 5))
+    
     # Classification Thresholds
     VALIDITY_THRESHOLD = 0.6  # Minimum score to consider complaint valid
     HIGH_PRIORITY_THRESHOLD = 0.7
@@ -25,6 +77,14 @@ class Config:
     
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "")
+    # Bulk write-back of analysis results (rows per COPY + UPDATE, chunks per commit)
+    WRITE_CHUNK_SIZE = int(os.getenv("WRITE_CHUNK_SIZE", 500))
+    WRITE_COMMIT_EVERY = int(os.getenv("WRITE_COMMIT_EVERY", 1))
+    # Rows fetched per round trip when streaming large tables
+    STREAM_ITERSIZE = int(os.getenv("STREAM_ITERSIZE", 2000))
+    # Dataset loading (rows per COPY and commit) and the complaint number sequence
+    INSERT_CHUNK_SIZE = int(os.getenv("INSERT_CHUNK_SIZE", 10000))
+    COMPLAINT_NUMBER_SEQUENCE = os.getenv("COMPLAINT_NUMBER_SEQUENCE", "complaint_number_seq")
     
     # Security
     API_KEY = os.getenv("API_KEY", "your-secret-api-key")
@@ -83,5 +143,28 @@ class Config:
         "পরিষেবা": ["service", "পরিষেবা", "ব্যবহার", "আচরণ", "behavior"],
         "প্রতারণা": ["প্রতারণা", "fraud", "ঠকানো", "cheat", "জাল", "fake"]
     }
+    
+    # Context Keywords (product/shop mentions that make a complaint look genuine)
+    CONTEXT_KEYWORDS = [
+        'দোকান', 'shop', 'পণ্য', 'product', 'বিক্রেতা', 'seller',
+        'কিনেছি', 'bought', 'purchased', 'খাবার', 'food', 'চাল', 'rice',
+        'ডাল', 'lentil', 'তেল', 'oil', 'দাম', 'price', 'টাকা', 'taka',
+        'ওজন', 'weight', 'মান', 'quality', 'সমস্যা', 'problem'
+    ]
+    
+    # Impact Keywords (severity boosters)
+    HEALTH_TERMS = ['স্বাস্থ্য', 'health', 'অসুস্থ', 'sick', 'হাসপাতাল', 'hospital', 'ডাক্তার', 'doctor']
+    FINANCIAL_TERMS = ['ক্ষতি', 'loss', 'টাকা', 'taka', 'money', 'refund']
+    
+    # Sentiment Keywords
+    SENTIMENT_KEYWORDS = {
+        "negative": [
+            'খারাপ', 'bad', 'ভয়ানক', 'terrible', 'নষ্ট', 'damaged',
+            'রাগ', 'angry', 'ক্ষতি', 'loss', 'প্রতারণা', 'fraud'
+        ],
+        "positive": [
+            'ভালো', 'good', 'সন্তুষ্ট', 'satisfied', 'ধন্যবাদ', 'thanks'
+        ]
+    }
 
 config = Config()
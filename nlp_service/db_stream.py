@@ -0,0 +1,40 @@
+"""
+Database Streaming
+Reads large result sets through named (server-side) cursors, so only
+`itersize` rows are held client-side at a time, and chunks row streams for
+read -> preprocess -> analyze -> write pipelines.
+"""
+
+import uuid
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+from config import config
+
+
+def stream_rows(conn, query: str, params: Optional[Sequence[Any]] = None,
+                itersize: Optional[int] = None, name: Optional[str] = None) -> Iterator[tuple]:
+    """
+    Yield the rows of a query from a server-side cursor
+    Use a connection that nothing else commits on while streaming: a commit
+    closes the cursor. The read transaction is ended when the stream is.
+    """
+    name = name or f"stream_{uuid.uuid4().hex[:8]}"
+    try:
+        with conn.cursor(name=name) as cur:
+            cur.itersize = itersize or config.STREAM_ITERSIZE
+            cur.execute(query, params)
+            for row in cur:
+                yield row
+    finally:
+        conn.rollback()
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split a stream into lists of `size` items (the last one may be shorter)"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -2,6 +2,8 @@
 import json
 import os
 
+from compiled_dict import write_compiled_dict
+
 file_path = 'banglish_dictionary.json'
 
 # Large dataset to append
@@ -580,5 +582,10 @@ def update_dictionary():
         
     print(f"Successfully added {len(new_data)} entries. Total count: {len(sorted_data)}")
 
+    # Rebuild the memory-mapped dictionary that banglish_dict.py loads at runtime
+    bin_path = file_path.replace('.json', '.bin')
+    write_compiled_dict(sorted_data, bin_path)
+    print(f"Compiled dictionary written to {bin_path}")
+
 if __name__ == "__main__":
     update_dictionary()
@@ -0,0 +1,82 @@
+"""
+Export mBERT and BanglishBERT to ONNX
+Writes the models served by INFERENCE_BACKEND=onnx to ONNX_MODEL_DIR
+(<dir>/mbert, <dir>/banglishbert) and applies dynamic int8 quantization:
+weights are stored as int8, activations are quantized per batch at run time,
+so no calibration data is needed.
+
+Usage: python export_onnx.py [--models mbert banglishbert] [--output-dir DIR] [--no-quantize]
+Needs: pip install -r requirements_onnx.txt
+Then compare against PyTorch with: python backend_parity.py
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+from config import config
+from model_registry import BANGLISHBERT_MODEL
+
+# name -> (Hugging Face model id, optimum ORTModel class)
+MODELS = {
+    'mbert': (config.BANGLA_BERT_MODEL, 'ORTModelForFeatureExtraction'),
+    'banglishbert': (BANGLISHBERT_MODEL, 'ORTModelForSeq2SeqLM'),
+}
+
+
+def _size_mb(paths) -> float:
+    return sum(os.path.getsize(path) for path in paths) / (1024 * 1024)
+
+
+def quantize_directory(path: str):
+    """Replace every .onnx graph in `path` with its dynamically int8-quantized version"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    graphs = sorted(glob.glob(os.path.join(path, '*.onnx')))
+    before = _size_mb(graphs)
+    for graph in graphs:
+        quantized = f"{graph}.int8.tmp"
+        quantize_dynamic(graph, quantized, weight_type=QuantType.QInt8)
+        os.replace(quantized, graph)
+    print(f"  🗜️ int8: {before:.0f} MB -> {_size_mb(graphs):.0f} MB ({len(graphs)} graphs)")
+
+
+def export_model(name: str, output_dir: str, quantize: bool = True) -> str:
+    """Export one model (graphs + tokenizer) to <output_dir>/<name>"""
+    import optimum.onnxruntime
+    from transformers import AutoTokenizer
+
+    model_id, model_class = MODELS[name]
+    target = os.path.join(output_dir, name)
+    started = time.monotonic()
+    print(f"📦 Exporting {name} ({model_id}) to {target}")
+
+    model = getattr(optimum.onnxruntime, model_class).from_pretrained(model_id, export=True)
+    model.save_pretrained(target)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(target)
+    print(f"  fp32: {_size_mb(glob.glob(os.path.join(target, '*.onnx'))):.0f} MB")
+
+    if quantize:
+        quantize_directory(target)
+    print(f"  ✅ {name} exported in {time.monotonic() - started:.0f}s")
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the transformer models to ONNX (int8)")
+    parser.add_argument('--models', nargs='+', choices=list(MODELS), default=list(MODELS))
+    parser.add_argument('--output-dir', default=config.ONNX_MODEL_DIR)
+    parser.add_argument('--no-quantize', action='store_true', help="keep fp32 weights")
+    args = parser.parse_args()
+
+    try:
+        import onnxruntime.quantization
+        import optimum.onnxruntime
+    except ImportError as e:
+        sys.exit(f"❌ {e}. Install the export dependencies: pip install -r requirements_onnx.txt")
+
+    for name in args.models:
+        export_model(name, args.output_dir, quantize=not args.no_quantize)
+    print(f"💾 Serve with INFERENCE_BACKEND=onnx ONNX_MODEL_DIR={args.output_dir}")
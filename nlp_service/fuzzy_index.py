@@ -0,0 +1,122 @@
+"""
+Fuzzy Match Index
+Drop-in replacement for difflib.get_close_matches(word, words, n=1, cutoff)
+over a large, fixed word list.
+
+Candidates come from a positional character-bigram inverted index bucketed
+by word length. A word can only reach `cutoff` if its length is close enough
+and it shares a minimum number of bigrams with the query, each shifted by at
+most the number of unmatched characters. All three bounds follow from
+SequenceMatcher's ratio 2*M/(len(a)+len(b)), so no true match is ever
+filtered out. Survivors are scored with the same SequenceMatcher calls as
+difflib, so results are identical, just without the linear scan.
+"""
+
+from array import array
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import profiling
+
+
+def _bigrams(word: str) -> List[str]:
+    return [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+class FuzzyIndex:
+    def __init__(self, words: Iterable[str], cutoff: float = 0.85):
+        self.cutoff = cutoff
+        self.words: List[str] = []
+        self._by_length: Dict[int, array] = {}
+        self._postings: Dict[Tuple[str, int, int], array] = {}
+
+        for word in words:
+            word_id = len(self.words)
+            self.words.append(word)
+            length = len(word)
+            self._by_length.setdefault(length, array('I')).append(word_id)
+            for position, bigram in enumerate(_bigrams(word)):
+                self._postings.setdefault((bigram, length, position), array('I')).append(word_id)
+
+        self.max_length = max(self._by_length, default=0)
+        self._bounds_cache: Dict[Tuple[int, int], Optional[Tuple[int, int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _bounds(self, query_len: int, length: int) -> Optional[Tuple[int, int, int]]:
+        """
+        For words of `length` that could reach cutoff against the query:
+        (min shared bigrams, max unmatched query chars, max unmatched word
+        chars), or None if no such word can exist.
+
+        With M matched characters, every query bigram survives unless one of
+        its characters is unmatched (at most 2 per unmatched query char) or it
+        straddles two matching blocks (each needs an unmatched char in the
+        other word): shared >= (la - 1) - 2 * (la - M) - (lb - M). A surviving
+        bigram moves by at most the unmatched characters before it, so its
+        position shifts within [-(la - M), lb - M].
+        """
+        key = (query_len, length)
+        if key in self._bounds_cache:
+            return self._bounds_cache[key]
+
+        total = query_len + length
+        if not total or 2.0 * min(query_len, length) / total < self.cutoff:
+            self._bounds_cache[key] = None
+            return None
+        matched = next(m for m in range(min(query_len, length) + 1) if 2.0 * m / total >= self.cutoff)
+        query_unmatched = query_len - matched
+        word_unmatched = length - matched
+        shared = (query_len - 1) - 2 * query_unmatched - word_unmatched
+        self._bounds_cache[key] = (shared, query_unmatched, word_unmatched)
+        return self._bounds_cache[key]
+
+    def candidates(self, word: str) -> List[int]:
+        """Ids of every indexed word that could reach the cutoff"""
+        query_len = len(word)
+        query_bigrams = _bigrams(word)
+        postings = self._postings
+        result: List[int] = []
+
+        for length in range(1, self.max_length + 1):
+            if length not in self._by_length:
+                continue
+            bounds = self._bounds(query_len, length)
+            if bounds is None:
+                continue
+            threshold, shift_left, shift_right = bounds
+            if threshold <= 0:
+                result.extend(self._by_length[length])
+                continue
+
+            # A word posted at several positions in the window is counted
+            # more than once: counts can only be overestimated, which keeps
+            # the candidate set a superset
+            counts = Counter()
+            for position, bigram in enumerate(query_bigrams):
+                for shifted in range(max(0, position - shift_left), position + shift_right + 1):
+                    posting = postings.get((bigram, length, shifted))
+                    if posting is not None:
+                        counts.update(posting)
+            result.extend(word_id for word_id, count in counts.items() if count >= threshold)
+
+        return result
+
+    def best_match(self, word: str) -> Optional[str]:
+        """Same result as difflib.get_close_matches(word, words, n=1, cutoff)[0]"""
+        matcher = SequenceMatcher()
+        matcher.set_seq2(word)
+        best = None
+        candidates = self.candidates(word)
+        profiling.count('fuzzy_candidates', len(candidates))
+        for word_id in candidates:
+            candidate = self.words[word_id]
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() >= self.cutoff and \
+               matcher.quick_ratio() >= self.cutoff:
+                score = matcher.ratio()
+                if score >= self.cutoff and (best is None or (score, candidate) > best):
+                    best = (score, candidate)
+        return best[1] if best else None
@@ -1,11 +1,30 @@
 """
-Generate 500 Realistic Complaints Dataset
+Generate Realistic Complaints Dataset
 Mix of Bengali, English, and Banglish complaints
+
+Without arguments, writes the 500-complaint complaints_dataset.json as before.
+For load tests it streams millions of seeded complaints to JSONL, JSON or
+Parquet (needs pyarrow) from a process pool, with a configurable language mix,
+length distribution, duplicate rate and spam/gibberish fractions:
+
+    python generate_complaints.py --count 1000000 --output complaints.jsonl \
+        --seed 42 --workers 8 --mean-sentences 2.5 --duplicate-rate 0.05 \
+        --spam-rate 0.03 --gibberish-rate 0.02
+
+The same seed and options give the same file for any number of workers.
 """
 
-import random
+import argparse
 import json
+import multiprocessing
+import os
+import random
+import string
+import sys
+import time
+from collections import deque
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 
 # Complaint templates in Bengali
 bengali_templates = [
@@ -161,88 +180,76 @@ complaints = {
 }
 
 
-def generate_complaint(language: str, shop_id: int, customer_id: int) -> dict:
-    """Generate a single complaint"""
-    
-    if language == "bengali":
-        template = random.choice(bengali_templates)
-        data = {
-            "shop": random.choice(shops["bengali"]),
-            "product": random.choice(products["bengali"]),
-            "issue": random.choice(issues_bengali),
-            "quality": random.choice(quality["bengali"]),
-            "feeling": random.choice(feelings["bengali"]),
-            "problem": random.choice(problems["bengali"]),
-            "severity": random.choice(severity["bengali"]),
-            "action": random.choice(actions["bengali"]),
-            "family": random.choice(family["bengali"]),
-            "complaint": random.choice(complaints["bengali"]),
-        }
-    elif language == "english":
-        template = random.choice(english_templates)
-        data = {
-            "shop": random.choice(shops["english"]),
-            "product": random.choice(products["english"]),
-            "issue": random.choice(issues_english),
-            "quality": random.choice(quality["english"]),
-            "feeling": random.choice(feelings["english"]),
-            "problem": random.choice(problems["english"]),
-            "severity": random.choice(severity["english"]),
-            "action": random.choice(actions["english"]),
-            "family": random.choice(family["english"]),
-            "complaint": random.choice(complaints["english"]),
-        }
-    else:  # banglish
-        template = random.choice(banglish_templates)
-        data = {
-            "shop": random.choice(shops["banglish"]),
-            "product": random.choice(products["banglish"]),
-            "issue": random.choice(issues_banglish),
-            "quality": random.choice(quality["banglish"]),
-            "feeling": random.choice(feelings["banglish"]),
-            "problem": random.choice(problems["banglish"]),
-            "severity": random.choice(severity["banglish"]),
-            "action": random.choice(actions["banglish"]),
-            "family": random.choice(family["banglish"]),
-            "complaint": random.choice(complaints["banglish"]),
-        }
-    
-    description = template.format(**data)
-    
-    # Generate categories
-    categories = [
-        "পণ্যের গুণগত মান সমস্যা",
-        "ভুল দাম বা অতিরিক্ত চার্জ",
-        "পণ্যের ওজন কম",
-        "খারাপ আচরণ",
-        "মেয়াদোত্তীর্ণ পণ্য",
-        "অন্যান্য",
-    ]
-    
-    # Determine category based on issue
+ISSUES = {"bengali": issues_bengali, "english": issues_english, "banglish": issues_banglish}
+TEMPLATES = {"bengali": bengali_templates, "english": english_templates, "banglish": banglish_templates}
+
+# Legacy distribution: 15% Bengali, 30% English, 55% Banglish
+DEFAULT_MIX = {"bengali": 0.15, "english": 0.30, "banglish": 0.55}
+
+CATEGORIES = [
+    "পণ্যের গুণগত মান সমস্যা",
+    "ভুল দাম বা অতিরিক্ত চার্জ",
+    "পণ্যের ওজন কম",
+    "খারাপ আচরণ",
+    "মেয়াদোত্তীর্ণ পণ্য",
+    "অন্যান্য",
+]
+
+# Spam submissions (promotions, scams) for validity load
+spam_templates = [
+    "Buy now!!! {offer} Click here: http://{domain}.com/{code}",
+    "Congratulations! You won {prize}. Call {phone} now to claim",
+    "FREE {product} offer!!! Visit www.{domain}.com today",
+    "Earn {amount} taka daily from home. WhatsApp {phone}",
+    "{product} sale sale sale!!! limited offer, click the link {domain}.com",
+]
+spam_data = {
+    "offer": ["50% discount on everything", "Free gift with every order", "Best price guaranteed"],
+    "domain": ["bestdeal", "cheap-offer", "winprize", "megasale"],
+    "prize": ["an iPhone", "10000 taka", "a free trip", "a lottery"],
+    "amount": ["500", "1000", "5000"],
+    "product": ["phone", "watch", "rice", "oil"],
+}
+
+
+def _template_data(language: str, rng) -> Dict[str, str]:
+    return {
+        "shop": rng.choice(shops[language]),
+        "product": rng.choice(products[language]),
+        "issue": rng.choice(ISSUES[language]),
+        "quality": rng.choice(quality[language]),
+        "feeling": rng.choice(feelings[language]),
+        "problem": rng.choice(problems[language]),
+        "severity": rng.choice(severity[language]),
+        "action": rng.choice(actions[language]),
+        "family": rng.choice(family[language]),
+        "complaint": rng.choice(complaints[language]),
+    }
+
+
+def _category(description: str, rng) -> str:
+    """Determine category based on issue"""
     if "মেয়াদ" in description or "expired" in description:
-        category = "মেয়াদোত্তীর্ণ পণ্য"
+        return "মেয়াদোত্তীর্ণ পণ্য"
     elif "ওজন" in description or "weight" in description or "ojon" in description:
-        category = "পণ্যের ওজন কম"
+        return "পণ্যের ওজন কম"
     elif "দাম" in description or "price" in description or "dam" in description or "charge" in description:
-        category = "ভুল দাম বা অতিরিক্ত চার্জ"
+        return "ভুল দাম বা অতিরিক্ত চার্জ"
     elif "খারাপ" in description or "quality" in description or "kharap" in description or "নষ্ট" in description:
-        category = "পণ্যের গুণগত মান সমস্যা"
-    else:
-        category = random.choice(categories)
-    
-    # Generate timestamp (last 30 days)
-    days_ago = random.randint(0, 30)
-    submitted_at = datetime.now() - timedelta(days=days_ago)
-    
+        return "পণ্যের গুণগত মান সমস্যা"
+    return rng.choice(CATEGORIES)
+
+
+def _record(customer_id: int, shop_id: int, shop: str, product: str, category: str,
+            description: str, submitted_at: datetime, language: str) -> dict:
     return {
         "customer_id": f"CUST{customer_id:05d}",
         "customer_name": f"Customer {customer_id}",
         "customer_email": f"customer{customer_id}@example.com",
         "customer_phone": f"+880171234{customer_id:04d}",
         "shop_owner_id": f"SHOP{shop_id:03d}",
-        "shop_name": data["shop"],
-        "product_name": data["product"],
+        "shop_name": shop,
+        "product_name": product,
         "category": category,
         "description": description,
         "submitted_at": submitted_at.isoformat(),
@@ -250,67 +257,277 @@ def generate_complaint(language: str, shop_id: int, customer_id: int) -> dict:
     }
 
 
-def generate_dataset(total: int = 500) -> list:
-    """Generate full dataset"""
-    
-    complaints = []
+def generate_complaint(language: str, shop_id: int, customer_id: int, rng=None,
+                       sentences: int = 1, reference: Optional[datetime] = None) -> dict:
+    """
+    Generate a single complaint
+    sentences: template sentences in the description (same shop and product)
+    reference: timestamps fall in the 30 days before it (default: now)
+    """
+    rng = rng or random
+    data = _template_data(language, rng)
+    parts = [rng.choice(TEMPLATES[language]).format(**data)]
+    for _ in range(sentences - 1):
+        extra = {**_template_data(language, rng), "shop": data["shop"], "product": data["product"]}
+        parts.append(rng.choice(TEMPLATES[language]).format(**extra))
+    description = " ".join(parts)
     
-    # Distribution: 15% Bengali, 30% English, 55% Banglish
-    num_bengali = int(total * 0.15)
-    num_english = int(total * 0.30)
-    num_banglish = total - num_bengali - num_english
-    
-    print(f"📊 Generating {total} complaints:")
-    print(f"  - Bengali: {num_bengali}")
-    print(f"  - English: {num_english}")
-    print(f"  - Banglish: {num_banglish}")
+    # Generate timestamp (last 30 days)
+    days_ago = rng.randint(0, 30)
+    submitted_at = (reference or datetime.now()) - timedelta(days=days_ago)
     
-    customer_id = 1
-    shop_id = 1
+    return _record(customer_id, shop_id, data["shop"], data["product"], _category(description, rng),
+                   description, submitted_at, language)
+
+
+def generate_spam(language: str, shop_id: int, customer_id: int, rng, reference: datetime) -> dict:
+    """A promotional/scam submission (should be judged invalid)"""
+    data = {key: rng.choice(values) for key, values in spam_data.items()}
+    data["code"] = ''.join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(6))
+    data["phone"] = f"01{rng.randint(300000000, 999999999)}"
+    description = rng.choice(spam_templates).format(**data)
+    submitted_at = reference - timedelta(days=rng.randint(0, 30))
+    return _record(customer_id, shop_id, rng.choice(shops[language]), data["product"], "অন্যান্য",
+                   description, submitted_at, language)
+
+
+def generate_gibberish(language: str, shop_id: int, customer_id: int, rng, reference: datetime) -> dict:
+    """Keyboard mashing, vowel-less words and repeated characters"""
+    words = []
+    for _ in range(rng.randint(3, 12)):
+        kind = rng.random()
+        if kind < 0.4:
+            words.append(''.join(rng.choice("bcdfghjklmnpqrstvwxz") for _ in range(rng.randint(3, 9))))
+        elif kind < 0.7:
+            words.append(rng.choice(string.ascii_lowercase) * rng.randint(3, 8))
+        else:
+            words.append(''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 10))))
+    submitted_at = reference - timedelta(days=rng.randint(0, 30))
+    return _record(customer_id, shop_id, rng.choice(shops[language]), rng.choice(products[language]),
+                   "অন্যান্য", ' '.join(words), submitted_at, language)
+
+
+# Streaming generation
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'bengali=0.15,english=0.3,banglish=0.55' -> normalized weights"""
+    mix = {}
+    for part in text.split(','):
+        language, _, weight = part.partition('=')
+        language = language.strip()
+        if language not in TEMPLATES:
+            raise argparse.ArgumentTypeError(f"unknown language '{language}' (use {', '.join(TEMPLATES)})")
+        mix[language] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise argparse.ArgumentTypeError("language weights must add up to more than 0")
+    return {language: weight / total for language, weight in mix.items()}
+
+
+def _sentence_count(rng, options: dict) -> int:
+    """1 + exponential tail with the requested mean, capped"""
+    mean = options['mean_sentences']
+    if mean <= 1:
+        return 1
+    return min(options['max_sentences'], 1 + int(rng.expovariate(1 / (mean - 1))))
+
+
+def _chunk_languages(rng, count: int, mix: Dict[str, float]) -> List[str]:
+    """Exactly int(count * weight) complaints per language (the last one takes the rest), shuffled"""
+    languages = list(mix)
+    counts = [int(count * mix[language]) for language in languages[:-1]]
+    counts.append(count - sum(counts))
+    chunk = [language for language, n in zip(languages, counts) for _ in range(n)]
+    rng.shuffle(chunk)
+    return chunk
+
+
+def generate_chunk(chunk_index: int, start: int, count: int, options: dict) -> List[dict]:
+    """
+    Complaints start+1 .. start+count. Seeded per chunk, so the output does not
+    depend on how chunks are spread over workers
+    """
+    rng = random.Random(f"{options['seed']}:{chunk_index}")
+    reference = datetime.fromisoformat(options['reference'])
+    languages = _chunk_languages(rng, count, options['mix'])
+    labelled = options['labelled']
+    recent = deque(maxlen=1000)  # duplicates are drawn from recent submissions
     
-    # Generate Bengali
-    for i in range(num_bengali):
-        complaint = generate_complaint("bengali", shop_id, customer_id)
-        complaints.append(complaint)
-        customer_id += 1
-        shop_id = (shop_id % 50) + 1
+    records = []
+    for offset in range(count):
+        customer_id = start + offset + 1
+        shop_id = customer_id % 50 + 1
+        roll = rng.random()
+        
+        if recent and roll < options['duplicate_rate']:
+            # Resubmission: same text and shop, new customer and time
+            original = rng.choice(recent)
+            record = {
+                **original,
+                **_record(customer_id, shop_id, original['shop_name'], original['product_name'],
+                          original['category'], original['description'],
+                          reference - timedelta(days=rng.randint(0, 30)), original['language']),
+                'is_duplicate': True
+            }
+            records.append(record)
+            continue
+        
+        language = languages[offset]
+        roll -= options['duplicate_rate']
+        if 0 <= roll < options['spam_rate']:
+            record = generate_spam(language, shop_id, customer_id, rng, reference)
+            record['label'] = 'spam'
+        elif 0 <= roll - options['spam_rate'] < options['gibberish_rate']:
+            record = generate_gibberish(language, shop_id, customer_id, rng, reference)
+            record['label'] = 'gibberish'
+        else:
+            record = generate_complaint(language, shop_id, customer_id, rng,
+                                        _sentence_count(rng, options), reference)
+        if labelled:
+            # Ground truth for load tests; plain datasets keep the complaints_dataset.json fields
+            record.setdefault('label', 'complaint')
+            record['is_duplicate'] = False
+        recent.append(record)
+        records.append(record)
+    return records
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        sys.exit("❌ Parquet output needs pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def _encode_chunk(task: tuple) -> bytes:
+    """
+    Worker: generate one chunk and encode it to the bytes the parent appends,
+    so the parent only copies buffers (UTF-8 text, or an Arrow IPC stream for Parquet)
+    """
+    chunk_index, start, count, options = task
+    records = generate_chunk(chunk_index, start, count, options)
+    if options['format'] == 'jsonl':
+        return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+    if options['format'] == 'json':
+        # Same layout as json.dump(list, indent=2)
+        return ',\n'.join(
+            '  ' + json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+            for record in records
+        ).encode('utf-8')
+    if not records:
+        return b''
+    pyarrow = _import_pyarrow()
+    table = pyarrow.table({key: [record[key] for record in records] for key in records[0]})
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class _ParquetSink:
+    def __init__(self, path: str):
+        self.pyarrow = _import_pyarrow()
+        self.path = path
+        self.writer = None
+
+    def write(self, encoded: bytes):
+        if not encoded:
+            return
+        table = self.pyarrow.ipc.open_stream(encoded).read_all()
+        if self.writer is None:
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.path, table.schema, compression='zstd')
+        self.writer.write_table(table)  # one row group per chunk
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def stream_dataset(total: int, output: str, options: dict, workers: int, chunk_size: int):
+    """Generate `total` complaints chunk by chunk and append them to `output` in order"""
+    tasks = [
+        (index, start, min(chunk_size, total - start), options)
+        for index, start in enumerate(range(0, total, chunk_size))
+    ]
     
-    # Generate English
-    for i in range(num_english):
-        complaint = generate_complaint("english", shop_id, customer_id)
-        complaints.append(complaint)
-        customer_id += 1
-        shop_id = (shop_id % 50) + 1
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    started = time.monotonic()
+    written = 0
+    pool = None
+    if workers > 1 and len(tasks) > 1:
+        ctx = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+        pool = ctx.Pool(workers)
+    sink = _ParquetSink(tmp_path) if options['format'] == 'parquet' else open(tmp_path, 'wb')
+    try:
+        if options['format'] == 'json':
+            sink.write(b'[\n')
+        # imap keeps chunk order; chunks are written as soon as they are ready
+        chunks = pool.imap(_encode_chunk, tasks) if pool else map(_encode_chunk, tasks)
+        for index, encoded in enumerate(chunks):
+            if options['format'] == 'json' and index and encoded:
+                sink.write(b',\n')
+            sink.write(encoded)
+            written += tasks[index][2]
+            rate = written / max(time.monotonic() - started, 1e-9)
+            print(f"  {written}/{total} complaints ({rate:,.0f}/s)", end='\r')
+        if options['format'] == 'json':
+            sink.write(b'\n]' if total else b']')
+    finally:
+        sink.close()
+        if pool:
+            pool.terminate()
+    os.replace(tmp_path, output)
+    print(f"\n✅ Generated {written} complaints in {time.monotonic() - started:.1f}s")
+    print(f"💾 Saved to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic complaints dataset")
+    parser.add_argument('--count', type=int, default=500)
+    parser.add_argument('--output', default='complaints_dataset.json')
+    parser.add_argument('--format', choices=['json', 'jsonl', 'parquet'],
+                        help="default: from the output extension (json otherwise)")
+    parser.add_argument('--seed', type=int, help="default: random (printed, to reproduce the file)")
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help="language weights, e.g. bengali=0.15,english=0.3,banglish=0.55")
+    parser.add_argument('--mean-sentences', type=float, default=1.0, help="mean template sentences per complaint")
+    parser.add_argument('--max-sentences', type=int, default=10)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0, help="fraction resubmitting a recent text")
+    parser.add_argument('--spam-rate', type=float, default=0.0)
+    parser.add_argument('--gibberish-rate', type=float, default=0.0)
+    parser.add_argument('--reference-date', default=datetime.now().strftime('%Y-%m-%d'),
+                        help="timestamps fall in the 30 days before this date")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=20000)
+    args = parser.parse_args()
     
-    # Generate Banglish
-    for i in range(num_banglish):
-        complaint = generate_complaint("banglish", shop_id, customer_id)
-        complaints.append(complaint)
-        customer_id += 1
-        shop_id = (shop_id % 50) + 1
+    if args.duplicate_rate + args.spam_rate + args.gibberish_rate > 1:
+        parser.error("duplicate, spam and gibberish rates add up to more than 1")
     
-    # Shuffle
-    random.shuffle(complaints)
+    extension = os.path.splitext(args.output)[1].lstrip('.')
+    output_format = args.format or (extension if extension in ('jsonl', 'parquet') else 'json')
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    options = {
+        'seed': seed,
+        'format': output_format,
+        'mix': args.mix,
+        'mean_sentences': args.mean_sentences,
+        'max_sentences': max(1, args.max_sentences),
+        'duplicate_rate': args.duplicate_rate,
+        'spam_rate': args.spam_rate,
+        'gibberish_rate': args.gibberish_rate,
+        'labelled': args.duplicate_rate + args.spam_rate + args.gibberish_rate > 0,
+        'reference': datetime.fromisoformat(args.reference_date).isoformat(),
+    }
     
-    return complaints
+    print("🚀 Generating complaints dataset...")
+    print(f"📊 {args.count} complaints -> {args.output} ({output_format}), seed {seed}")
+    print("  - Mix: " + ", ".join(f"{language} {weight:.0%}" for language, weight in args.mix.items()))
+    print(f"  - Duplicates {args.duplicate_rate:.1%}, spam {args.spam_rate:.1%}, gibberish {args.gibberish_rate:.1%}")
+    stream_dataset(args.count, args.output, options, max(1, args.workers), max(1, args.chunk_size))
 
 
 if __name__ == "__main__":
-    print("🚀 Generating complaints dataset...")
-    
-    complaints = generate_dataset(500)
-    
-    # Save to JSON
-    output_file = "complaints_dataset.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(complaints, f, ensure_ascii=False, indent=2)
-    
-    print(f"✅ Generated {len(complaints)} complaints")
-    print(f"💾 Saved to {output_file}")
-    
-    # Print sample
-    print(f"\n📝 Sample complaints:")
-    for i, complaint in enumerate(complaints[:5]):
-        print(f"\n{i+1}. [{complaint['language'].upper()}]")
-        print(f"   {complaint['description'][:100]}...")
-        print(f"   Category: {complaint['category']}")
+    main()
@@ -0,0 +1,77 @@
+"""
+Bounded Inference Pool
+Runs blocking preprocessing/model work off the asyncio event loop
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the pool already holds as many jobs as it may queue"""
+
+
+class InferencePool:
+    """
+    Thread pool with a hard limit on running + queued jobs.
+
+    Callers beyond the limit are rejected immediately instead of piling up,
+    so the event loop stays free for health checks and cheap requests.
+    Threads (not processes) are used so all workers share the loaded models.
+    """
+
+    def __init__(self, max_workers: int, queue_depth: int):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.capacity = max_workers + queue_depth
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="inference"
+        )
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs currently running or waiting for a worker"""
+        return self._pending
+
+    @property
+    def queued(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self._pending - self.max_workers)
+
+    def _release(self):
+        self._pending -= 1
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) on a worker thread and await its result
+        Raises PoolSaturatedError when the queue is full
+        """
+        if self._pending >= self.capacity:
+            raise PoolSaturatedError(
+                f"Inference queue is full ({self._pending}/{self.capacity} jobs)"
+            )
+
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+
+        # Release the slot when the job really finishes, even if the caller
+        # has gone away in the meantime
+        def on_done(_future):
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:
+                pass  # event loop already closed (shutdown)
+
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,57 +1,97 @@
 """
 Insert generated complaints into database
+Streams the dataset (JSON array, JSONL or Parquet) in chunks, loads each chunk
+with COPY ... FROM STDIN and numbers complaints from a Postgres sequence,
+reserving one block of numbers per chunk
+
+Usage: python insert_complaints.py [complaints_dataset.json | complaints.jsonl] [--chunk-size N]
 """
 
+import argparse
+import io
 import json
-import psycopg2
-from psycopg2.extras import execute_batch
-from datetime import datetime
 import os
+import sys
+import time
+from typing import Iterable, Iterator, List
+
+import psycopg2
+from psycopg2 import sql
 from dotenv import load_dotenv
 
+from bulk_writer import copy_field
+from config import config
+from db_stream import chunked
+
 load_dotenv()
 
 # Database connection
 DATABASE_URL = os.getenv("DATABASE_URL", "")
 
-def insert_complaints(complaints: list):
-    """Insert complaints into database"""
-    
-    print(f"🔌 Connecting to database...")
-    conn = psycopg2.connect(DATABASE_URL)
-    cursor = conn.cursor()
-    
-    print(f"📥 Inserting {len(complaints)} complaints...")
-    
-    # Generate unique complaint numbers
-    cursor.execute("SELECT MAX(SUBSTRING(complaint_number FROM 5)::INTEGER) FROM complaints WHERE complaint_number LIKE 'CMP-%'")
-    result = cursor.fetchone()
-    last_number = result[0] if result[0] else 0
-    
-    insert_query = """
-    INSERT INTO complaints (
-        complaint_number,
-        customer_id,
-        customer_name,
-        customer_email,
-        customer_phone,
-        shop_name,
-        product_name,
-        category,
-        description,
-        status,
-        submitted_at
-    ) VALUES (
-        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-    )
+COLUMNS = [
+    'complaint_number',
+    'customer_id',
+    'customer_name',
+    'customer_email',
+    'customer_phone',
+    'shop_name',
+    'product_name',
+    'category',
+    'description',
+    'status',
+    'submitted_at',
+]
+
+
+def read_complaints(path: str) -> Iterator[dict]:
+    """Yield complaints one at a time; JSONL and Parquet are never fully loaded"""
+    if path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            sys.exit("❌ Reading Parquet needs pyarrow (pip install pyarrow)")
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=config.INSERT_CHUNK_SIZE):
+            yield from batch.to_pylist()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def ensure_sequence(cursor, sequence: str):
+    """
+    Create the complaint number sequence on first use, starting after the
+    highest existing CMP- number (the only MAX scan; later loads just draw from it)
     """
-    
-    data = []
-    for i, complaint in enumerate(complaints):
-        complaint_number = f"CMP-{last_number + i + 1:06d}"
-        
-        data.append((
-            complaint_number,
+    cursor.execute(sql.SQL("CREATE SEQUENCE IF NOT EXISTS {}").format(sql.Identifier(sequence)))
+    cursor.execute(sql.SQL("SELECT is_called FROM {}").format(sql.Identifier(sequence)))
+    if cursor.fetchone()[0]:
+        return
+    cursor.execute(
+        "SELECT MAX(SUBSTRING(complaint_number FROM 5)::BIGINT) FROM complaints "
+        "WHERE complaint_number ~ '^CMP-[0-9]+$'"
+    )
+    last_number = cursor.fetchone()[0]
+    if last_number:
+        print(f"🔢 Starting {sequence} after existing CMP-{last_number:06d}")
+        cursor.execute("SELECT setval(%s, %s)", (sequence, last_number))
+
+
+def reserve_numbers(cursor, sequence: str, count: int) -> List[int]:
+    """Draw `count` complaint numbers from the sequence in one round trip"""
+    cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", (sequence, count))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _copy_chunk(cursor, complaints: List[dict], numbers: List[int]):
+    buffer = io.StringIO()
+    for number, complaint in zip(numbers, complaints):
+        values = (
+            f"CMP-{number:06d}",
             complaint["customer_id"],
             complaint["customer_name"],
             complaint["customer_email"],
@@ -62,25 +102,68 @@ def insert_complaints(complaints: list):
             complaint["description"],
             "Received",
             complaint["submitted_at"],
-        ))
-    
-    # Batch insert
-    execute_batch(cursor, insert_query, data, page_size=100)
-    
+        )
+        buffer.write('\t'.join(copy_field(value, 'text') for value in values))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(
+        sql.SQL("COPY complaints ({}) FROM STDIN").format(
+            sql.SQL(', ').join(map(sql.Identifier, COLUMNS))
+        ).as_string(cursor),
+        buffer
+    )
+
+
+def insert_complaints(complaints: Iterable[dict], chunk_size: int = None) -> int:
+    """Insert complaints into database, one COPY and commit per chunk"""
+    chunk_size = chunk_size or config.INSERT_CHUNK_SIZE
+    sequence = config.COMPLAINT_NUMBER_SEQUENCE
+
+    print(f"🔌 Connecting to database...")
+    conn = psycopg2.connect(DATABASE_URL)
+    cursor = conn.cursor()
+
+    ensure_sequence(cursor, sequence)
     conn.commit()
-    cursor.close()
-    conn.close()
-    
-    print(f"✅ Successfully inserted {len(complaints)} complaints")
-    print(f"📋 Complaint numbers: CMP-{last_number + 1:06d} to CMP-{last_number + len(complaints):06d}")
+
+    print(f"📥 Inserting complaints ({chunk_size} per chunk)...")
+    started = time.monotonic()
+    inserted = 0
+    first_number = last_number = None
+    try:
+        for chunk in chunked(complaints, chunk_size):
+            # Numbers drawn here are never handed out again, even if the chunk
+            # fails; a failed load leaves a gap in the numbering, not a clash
+            numbers = reserve_numbers(cursor, sequence, len(chunk))
+            _copy_chunk(cursor, chunk, numbers)
+            conn.commit()
+
+            inserted += len(chunk)
+            first_number = numbers[0] if first_number is None else first_number
+            last_number = numbers[-1]
+            rate = inserted / max(time.monotonic() - started, 1e-9)
+            print(f"  {inserted} complaints ({rate:,.0f}/s)", end='\r')
+    except Exception:
+        conn.rollback()
+        print(f"\n❌ Stopped after {inserted} complaints (committed chunks stay)")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"\n✅ Successfully inserted {inserted} complaints in {time.monotonic() - started:.1f}s")
+    if inserted:
+        print(f"📋 Complaint numbers: CMP-{first_number:06d} to CMP-{last_number:06d}")
+    return inserted
 
 
 if __name__ == "__main__":
-    print("🚀 Loading complaints dataset...")
-    
-    with open("complaints_dataset.json", "r", encoding="utf-8") as f:
-        complaints = json.load(f)
-    
-    print(f"📊 Loaded {len(complaints)} complaints")
-    
-    insert_complaints(complaints)
+    parser = argparse.ArgumentParser(description="Load a generated complaints dataset into Postgres")
+    parser.add_argument('dataset', nargs='?', default="complaints_dataset.json",
+                        help="JSON array, .jsonl or .parquet file")
+    parser.add_argument('--chunk-size', type=int, default=config.INSERT_CHUNK_SIZE,
+                        help="complaints per COPY and commit")
+    args = parser.parse_args()
+
+    print(f"🚀 Loading complaints from {args.dataset}...")
+    insert_complaints(read_complaints(args.dataset), max(1, args.chunk_size))
@@ -0,0 +1,87 @@
+"""
+Job Checkpoints
+Durable progress records for long batch jobs over the complaint tables: the
+last id of the last committed page and the pipeline version it was judged
+with. save() runs inside the caller's transaction, so a checkpoint is
+committed together with the page it describes.
+"""
+
+from typing import Dict, Optional
+
+CHECKPOINT_TABLE = 'job_checkpoints'
+
+
+def ensure_checkpoint_table(conn):
+    """
+    Create the checkpoint table (and commit). Parallel jobs call this once
+    before starting workers: concurrent CREATE TABLE IF NOT EXISTS can fail
+    with a unique violation in Postgres.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                job_name TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                last_id BIGINT NOT NULL DEFAULT 0,
+                pipeline_version TEXT,
+                rows_done BIGINT NOT NULL DEFAULT 0,
+                completed BOOLEAN NOT NULL DEFAULT FALSE,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (job_name, table_name)
+            )
+        """)
+    conn.commit()
+
+
+class CheckpointStore:
+    def __init__(self, conn, job_name: str, create_table: bool = True):
+        """create_table: False when the table was created up front (workers skip DDL)"""
+        self.conn = conn
+        self.job_name = job_name
+        if create_table:
+            ensure_checkpoint_table(conn)
+
+    def load(self, table: str) -> Optional[Dict]:
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"SELECT last_id, pipeline_version, rows_done, completed, updated_at "
+                f"FROM {CHECKPOINT_TABLE} WHERE job_name = %s AND table_name = %s",
+                (self.job_name, table)
+            )
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return {
+            'last_id': row[0],
+            'pipeline_version': row[1],
+            'rows_done': row[2],
+            'completed': row[3],
+            'updated_at': row[4]
+        }
+
+    def save(self, table: str, last_id: int, pipeline_version: str, rows_done: int,
+             completed: bool = False):
+        """Upsert the checkpoint; committed by the caller with the page's writes"""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"""
+                INSERT INTO {CHECKPOINT_TABLE}
+                    (job_name, table_name, last_id, pipeline_version, rows_done, completed, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, NOW())
+                ON CONFLICT (job_name, table_name) DO UPDATE SET
+                    last_id = EXCLUDED.last_id,
+                    pipeline_version = EXCLUDED.pipeline_version,
+                    rows_done = EXCLUDED.rows_done,
+                    completed = EXCLUDED.completed,
+                    updated_at = EXCLUDED.updated_at
+                """,
+                (self.job_name, table, last_id, pipeline_version, rows_done, completed)
+            )
+
+    def reset(self, table: str):
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"DELETE FROM {CHECKPOINT_TABLE} WHERE job_name = %s AND table_name = %s",
+                (self.job_name, table)
+            )
+        self.conn.commit()
@@ -0,0 +1,170 @@
+"""
+Single-pass Keyword Matcher
+Scans complaint text once for every keyword group used by the classifier
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, FrozenSet, List, Optional
+
+import profiling
+
+
+def _trie_pattern(terms: List[str]) -> str:
+    """Build a regex alternation factored by common prefixes"""
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = {}  # end-of-keyword marker
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [
+            re.escape(ch) + build(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordHits:
+    """Per-group keyword hits for one document"""
+
+    def __init__(self, terms: Dict[str, List[str]], counts: Dict[str, int]):
+        self._terms = terms
+        self._counts = counts
+
+    def count(self, group: str) -> int:
+        """Number of group keywords found in the text"""
+        return self._counts.get(group, 0)
+
+    def terms(self, group: str) -> List[str]:
+        """Distinct group keywords found in the text"""
+        return self._terms.get(group, [])
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+
+class KeywordMatcher:
+    """
+    Matches every keyword group against a text in one regex scan.
+
+    Keeps the semantics of `keyword in text` (plain substring match, overlaps
+    allowed): the compiled alternation reports the longest keyword starting
+    at each position, and every keyword contained in it is counted as well.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        self.groups = {name: list(keywords) for name, keywords in groups.items()}
+
+        # term -> [(group, multiplicity)]; duplicated keywords count twice,
+        # exactly like the old `sum(1 for keyword in ...)` loops
+        self._term_groups: Dict[str, List[tuple]] = {}
+        for name, keywords in self.groups.items():
+            multiplicity: Dict[str, int] = {}
+            for keyword in keywords:
+                if keyword:
+                    multiplicity[keyword] = multiplicity.get(keyword, 0) + 1
+            for keyword, n in multiplicity.items():
+                self._term_groups.setdefault(keyword, []).append((name, n))
+
+        terms = sorted(self._term_groups, key=len, reverse=True)
+
+        # Keywords contained in a longer keyword are implied by its match
+        self._implied: Dict[str, FrozenSet[str]] = {
+            term: frozenset(other for other in terms if other in term)
+            for term in terms
+        }
+
+        # Lookahead so overlapping keywords at every position are reported.
+        # The alternation is factored into a prefix trie: the regex engine
+        # follows one branch per character instead of trying every keyword,
+        # and greedy optionals pick the longest keyword at each position.
+        self.pattern: Optional[re.Pattern] = None
+        if terms:
+            first_chars = ''.join(sorted({term[0] for term in terms}))
+            self.pattern = re.compile(
+                '(?=[' + re.escape(first_chars) + '])(?=(' + _trie_pattern(terms) + '))'
+            )
+
+    @classmethod
+    def from_config(cls, config) -> 'KeywordMatcher':
+        """Build the matcher for all keyword groups defined in config"""
+        groups = {'spam': config.SPAM_KEYWORDS}
+        for level, keywords in config.PRIORITY_KEYWORDS.items():
+            groups[f'priority.{level}'] = keywords
+        for level, keywords in config.SEVERITY_KEYWORDS.items():
+            groups[f'severity.{level}'] = keywords
+        for category, keywords in config.CATEGORY_KEYWORDS.items():
+            groups[f'category.{category}'] = keywords
+        for polarity, keywords in config.SENTIMENT_KEYWORDS.items():
+            groups[f'sentiment.{polarity}'] = keywords
+        groups['context'] = config.CONTEXT_KEYWORDS
+        groups['health'] = config.HEALTH_TERMS
+        groups['financial'] = config.FINANCIAL_TERMS
+        return cls(groups)
+
+    def find_terms(self, text: str) -> FrozenSet[str]:
+        """Return every keyword (from any group) that occurs in text"""
+        if self.pattern is None:
+            return frozenset()
+
+        profiling.count('regex_scans')
+        longest = {match.group(1) for match in self.pattern.finditer(text)}
+        if len(longest) == 1:
+            return self._implied[longest.pop()]
+
+        found = set()
+        for term in longest:
+            found |= self._implied[term]
+        return frozenset(found)
+
+    def scan(self, text: str) -> KeywordHits:
+        """
+        Scan text once and return hits for every group.
+        Text should already be lowercased, as the detectors expect.
+        """
+        return self._collect(self.find_terms(text))
+
+    def scan_many(self, texts: List[str]) -> List[KeywordHits]:
+        """
+        Scan a whole batch of (lowercased) texts in a single regex pass.
+        Documents are joined with NUL, which no keyword contains, so a
+        match never spans two documents.
+        """
+        if self.pattern is None or not texts:
+            return [KeywordHits({}, {}) for _ in texts]
+
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+
+        profiling.count('regex_scans')
+        longest: List[set] = [set() for _ in texts]
+        for match in self.pattern.finditer('\0'.join(texts)):
+            longest[bisect_right(starts, match.start()) - 1].add(match.group(1))
+
+        hits = []
+        for terms in longest:
+            found = set()
+            for term in terms:
+                found |= self._implied[term]
+            hits.append(self._collect(frozenset(found)))
+        return hits
+
+    def _collect(self, found: FrozenSet[str]) -> KeywordHits:
+        terms: Dict[str, List[str]] = {}
+        counts: Dict[str, int] = {}
+        for term in found:
+            for group, n in self._term_groups[term]:
+                terms.setdefault(group, []).append(term)
+                counts[group] = counts.get(group, 0) + n
+        return KeywordHits(terms, counts)
@@ -0,0 +1,197 @@
+"""
+Bounded LRU Cache
+Thread-safe in-memory LRU with hit/miss counters, optional expiry, and an
+optional SQLite tier that keeps entries across process restarts and shares
+them between processes
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+MISSING = object()
+
+# Persistent writes between two purges of expired/excess rows
+PURGE_EVERY = 1000
+
+
+class LRUCache:
+    def __init__(self, max_size: int, persistent_path: Optional[str] = None,
+                 namespace: str = 'default', commit_every: int = 50,
+                 ttl: Optional[float] = None, max_persistent: Optional[int] = None):
+        """
+        ttl: seconds an entry stays valid (None = forever)
+        max_persistent: row bound of the SQLite tier for this namespace (oldest writes go first)
+        """
+        self.max_size = max(0, max_size)
+        self.namespace = namespace
+        self.ttl = ttl or None
+        self.max_persistent = max_persistent
+        # key -> (expires_at or None, value)
+        self._data: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expired = 0
+
+        # Optional persistent tier (values stored as JSON)
+        self.persistent_path = persistent_path
+        self._db = None
+        self._pending: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._commit_every = max(1, commit_every)
+        self._writes_since_purge = 0
+        if persistent_path:
+            self._db = self._connect()
+            atexit.register(self.flush)
+            if hasattr(os, 'register_at_fork'):
+                # A SQLite connection must not be used across fork (pre-forked
+                # service workers): flush first, then each child opens its own
+                os.register_at_fork(before=self.flush, after_in_child=self._reopen_after_fork)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Several processes may share the file: writes are batched into
+        # short transactions and readers never block in WAL mode
+        db = sqlite3.connect(self.persistent_path, check_same_thread=False, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        # A cache can lose its last writes on power loss; skip the fsync per commit
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "expires_at REAL, PRIMARY KEY (namespace, key))"
+        )
+        columns = {row[1] for row in db.execute("PRAGMA table_info(cache)")}
+        if 'expires_at' not in columns:
+            db.execute("ALTER TABLE cache ADD COLUMN expires_at REAL")
+        db.commit()
+        return db
+
+    def _reopen_after_fork(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._db = self._connect()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            now = time.time()
+            entry = self._data.get(key, MISSING)
+            if entry is not MISSING:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expired += 1
+
+            if self._db is not None:
+                stored = self._pending.get(key)
+                if stored is None:
+                    stored = self._db.execute(
+                        "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                        (self.namespace, key)
+                    ).fetchone()
+                if stored is not None and (stored[1] is None or stored[1] > now):
+                    value = json.loads(stored[0])
+                    self._store(key, value, stored[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return default
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            expires_at = time.time() + self.ttl if self.ttl else None
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                try:
+                    self._pending[key] = (json.dumps(value, ensure_ascii=False), expires_at)
+                except (TypeError, ValueError) as e:
+                    logging.warning(f"⚠️ Not persisting cache entry: {e}")
+                    return
+                if len(self._pending) >= self._commit_every:
+                    self._write_pending()
+
+    def _store(self, key: str, value: Any, expires_at: Optional[float]):
+        if self.max_size == 0:
+            return
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _write_pending(self):
+        """Write queued entries in one transaction (caller holds the lock)"""
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                [(self.namespace, key, value, expires_at) for key, (value, expires_at) in self._pending.items()]
+            )
+            self._writes_since_purge += len(self._pending)
+            if self._writes_since_purge >= PURGE_EVERY:
+                self._purge()
+            self._db.commit()
+        except sqlite3.Error as e:
+            # The persistent tier is best-effort; the in-memory entries stay valid
+            self._db.rollback()
+            logging.warning(f"⚠️ Could not persist {len(self._pending)} cache entries: {e}")
+        self._pending = {}
+
+    def _purge(self):
+        """Drop expired rows and, above max_persistent, the oldest writes"""
+        self._writes_since_purge = 0
+        self._db.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time())
+        )
+        if self.max_persistent:
+            excess = self._db.execute(
+                "SELECT count(*) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0] - self.max_persistent
+            if excess > 0:
+                # INSERT OR REPLACE gives rewritten keys a new rowid, so rowid order is write order
+                self._db.execute(
+                    "DELETE FROM cache WHERE rowid IN ("
+                    "SELECT rowid FROM cache WHERE namespace = ? ORDER BY rowid LIMIT ?)",
+                    (self.namespace, excess)
+                )
+
+    def flush(self):
+        """Write pending entries of the persistent tier"""
+        with self._lock:
+            if self._db is not None and self._pending:
+                self._write_pending()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'disk_hits': self.disk_hits,
+            'evictions': self.evictions,
+            'expired': self.expired,
+            'ttl': self.ttl,
+            'persistent': self._db is not None
+        }
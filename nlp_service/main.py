@@ -3,16 +3,28 @@ FastAPI Application for NLP Service
 AI-Enhanced Complaint Management System
 """
 
-from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi import FastAPI, HTTPException, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
+import contextvars
+import copy
+import time
 import uvicorn
 from datetime import datetime
 
 from config import config
 from preprocessor import TextPreprocessor
 from classifier import ComplaintClassifier
+from batch_engine import BatchEngine
+from inference_pool import InferencePool, PoolSaturatedError
+from micro_batcher import MicroBatcher
+from model_registry import SERVICE_MODELS, model_registry
+from lru_cache import LRUCache
+from versioning import content_hash, pipeline_fingerprint
+from metrics import registry as metrics_registry
+from profiling import profiling
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -33,6 +45,158 @@ app.add_middleware(
 # Initialize NLP components
 preprocessor = TextPreprocessor()
 classifier = ComplaintClassifier()
+batch_engine = BatchEngine(preprocessor, classifier)
+
+# Bounded executor for blocking inference work
+inference_pool = InferencePool(
+    max_workers=config.INFERENCE_WORKERS,
+    queue_depth=config.INFERENCE_QUEUE_DEPTH
+)
+
+@app.on_event("startup")
+async def start_micro_batcher():
+    if config.MICRO_BATCH_ENABLED:
+        await micro_batcher.start()
+
+@app.on_event("startup")
+async def warm_up_models():
+    # Server is already accepting traffic; models load on a background thread
+    if config.MODEL_WARMUP and SERVICE_MODELS and not config.RULES_ONLY:
+        model_registry.warm_up_in_background(SERVICE_MODELS)
+
+@app.on_event("shutdown")
+async def shutdown_inference_pool():
+    await micro_batcher.stop()
+    inference_pool.shutdown()
+    result_cache.flush()
+
+# Results of repeated submissions (resubmits, client retries), valid for one
+# pipeline version; the optional SQLite tier is shared by all uvicorn workers.
+# Only touched from the inference pool, so SQLite waits never block the event loop
+result_cache = LRUCache(
+    config.RESULT_CACHE_SIZE,
+    persistent_path=config.RESULT_CACHE_PATH or None,
+    namespace='result',
+    ttl=config.RESULT_CACHE_TTL,
+    max_persistent=config.RESULT_CACHE_MAX_ENTRIES
+)
+
+def result_cache_key(cleaned_text: str, language: str) -> str:
+    """
+    Pipeline version + detected language + hash of the cleaned text:
+    submissions that differ only in what clean_text removes (URLs, emails,
+    spacing, repeated punctuation) share one result. Language is detected on
+    the raw text, so what clean_text removes can change it
+    """
+    # Service analysis never translates, so results depend on the rules only:
+    # a model finishing its warm-up must not invalidate them
+    version = pipeline_fingerprint('dictionary')
+    return f"{version}:{language}:{content_hash(cleaned_text)}"
+
+def run_cached_analysis_batch(texts: list[str]) -> list[tuple]:
+    """
+    Analyze complaints, reusing cached results of earlier submissions (runs on
+    the inference pool). Each text is cleaned once: the cleaned text is both
+    part of the cache key and the pipeline input.
+    Returns: [(cleaned_text, analysis, cached), ...] in input order
+    """
+    cleaned_texts = [preprocessor.clean_text(text) for text in texts]
+    keys = [
+        result_cache_key(cleaned_text, preprocessor.detect_language(text))
+        for text, cleaned_text in zip(texts, cleaned_texts)
+    ]
+    outputs = [None] * len(texts)
+    misses = []
+    for i, key in enumerate(keys):
+        cached = result_cache.get(key)
+        if cached is not None:
+            cleaned_text, analysis = copy.deepcopy(cached)
+            outputs[i] = (cleaned_text, analysis, True)
+        else:
+            misses.append(i)
+    
+    if misses:
+        _, results, _ = batch_engine.analyze_detailed(
+            [texts[i] for i in misses], [cleaned_texts[i] for i in misses]
+        )
+        for i, analysis in zip(misses, results):
+            result_cache.put(keys[i], copy.deepcopy((cleaned_texts[i], analysis)))
+            outputs[i] = (cleaned_texts[i], analysis, False)
+    return outputs
+
+# Groups concurrent single-complaint requests into one batch
+micro_batcher = MicroBatcher(
+    run_cached_analysis_batch,
+    inference_pool,
+    max_batch_size=config.MICRO_BATCH_MAX_SIZE,
+    window_ms=config.MICRO_BATCH_WINDOW_MS,
+    max_queue_size=config.INFERENCE_QUEUE_DEPTH * config.MICRO_BATCH_MAX_SIZE
+)
+
+# Request metrics (stage latencies are recorded by the pipeline itself)
+REQUESTS = metrics_registry.counter('nlp_requests_total', 'HTTP requests handled', ['endpoint', 'status'])
+REQUEST_ERRORS = metrics_registry.counter('nlp_request_errors_total', 'HTTP requests answered with 5xx', ['endpoint'])
+REQUEST_SECONDS = metrics_registry.histogram('nlp_request_duration_seconds', 'HTTP request latency', ['endpoint'])
+QUEUE_DEPTH = metrics_registry.gauge('nlp_queue_depth', 'Jobs waiting or running', ['queue'])
+CACHE_LOOKUPS = metrics_registry.counter('nlp_cache_lookups_total', 'Cache lookups by result', ['cache', 'result'])
+CACHE_HIT_RATIO = metrics_registry.gauge('nlp_cache_hit_ratio', 'Cache hits / lookups since start', ['cache'])
+CACHE_SIZE = metrics_registry.gauge('nlp_cache_entries', 'Entries held in memory', ['cache'])
+MODEL_STATE = metrics_registry.gauge('nlp_model_state', '1 for the current load state of each model', ['model', 'state'])
+MODEL_STATES = ('disabled', 'not_loaded', 'loading', 'loaded', 'failed')
+
+def collect_service_metrics():
+    """Refresh gauges from the pool, batcher, caches and model registry"""
+    QUEUE_DEPTH.set(inference_pool.pending, queue='inference_pending')
+    QUEUE_DEPTH.set(inference_pool.queued, queue='inference_waiting')
+    QUEUE_DEPTH.set(micro_batcher.queue_size, queue='micro_batch')
+    
+    caches = {
+        'result': result_cache,
+        'translation': preprocessor.translation_cache,
+        'token': preprocessor.token_cache
+    }
+    for name, cache in caches.items():
+        stats = cache.stats()
+        CACHE_LOOKUPS.set_total(stats['hits'], cache=name, result='hit')
+        CACHE_LOOKUPS.set_total(stats['misses'], cache=name, result='miss')
+        CACHE_HIT_RATIO.set(stats['hit_rate'], cache=name)
+        CACHE_SIZE.set(stats['size'], cache=name)
+    
+    for model, current in model_registry.states().items():
+        for state in MODEL_STATES:
+            MODEL_STATE.set(1 if state == current else 0, model=model, state=state)
+
+metrics_registry.add_collector(collect_service_metrics)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route template, not the raw path, keeps label cardinality bounded
+        route = request.scope.get('route')
+        endpoint = getattr(route, 'path', None) or 'unmatched'
+        REQUESTS.inc(endpoint=endpoint, status=str(status))
+        if status >= 500:
+            REQUEST_ERRORS.inc(endpoint=endpoint)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+
+def service_busy(error: PoolSaturatedError) -> HTTPException:
+    """503 backpressure response when the inference queue is full"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Service busy: {str(error)}",
+        headers={"Retry-After": "1"}
+    )
+
+def run_analysis(text: str):
+    """Preprocess and analyze one complaint (runs on the inference pool)"""
+    context, features = preprocessor.prepare(text)
+    return context.text, classifier.analyze_complaint(context.text, features, context=context)
 
 # Pydantic models
 class ComplaintRequest(BaseModel):
@@ -56,11 +220,16 @@ class ComplaintResponse(BaseModel):
     analysis: Dict[str, Any]
     processed_at: str
     processing_time_ms: float
+    cached: bool = False
+    # Per-stage timings and work counters, only with ?profile=1
+    profile: Optional[Dict[str, Any]] = None
 
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
     timestamp: str
+    mode: str = "full"
+    models: Dict[str, str] = {}
 
 # Security dependency
 async def verify_api_key(x_api_key: str = Header(None)):
@@ -75,7 +244,7 @@ async def root():
     """Health check endpoint"""
     return HealthResponse(
         status="running",
-        model_loaded=True,
+        model_loaded=classifier.model_loaded,
         timestamp=datetime.now().isoformat()
     )
 
@@ -84,13 +253,24 @@ async def health_check():
     """Detailed health check"""
     return HealthResponse(
         status="healthy",
-        model_loaded=classifier.base_model is not None,
-        timestamp=datetime.now().isoformat()
+        model_loaded=classifier.model_loaded,
+        timestamp=datetime.now().isoformat(),
+        mode="rules" if config.RULES_ONLY else "full",
+        models=model_registry.states()
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: request counts/latency, per-stage latency, queues, caches, models"""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
     )
 
 @app.post("/api/analyze-complaint", response_model=ComplaintResponse)
 async def analyze_complaint(
     request: ComplaintRequest,
+    profile: bool = False,
     api_key: str = Depends(verify_api_key)
 ):
     """
@@ -100,15 +280,29 @@ async def analyze_complaint(
     - Sentiment analysis (Positive/Negative/Neutral)
     - Category detection
     - AI-generated summary
+    With ?profile=1 the response also carries a per-stage timing breakdown and
+    work counters (regex scans, dictionary lookups, fuzzy candidates, beam tokens)
     """
     try:
         start_time = datetime.now()
+        request_profile = None
+        cached = False
         
-        # Step 1: Preprocess text
-        cleaned_text, features = preprocessor.preprocess(request.complaint_text)
-        
-        # Step 2: Run AI analysis
-        analysis_result = classifier.analyze_complaint(cleaned_text, features)
+        # Profiled requests run alone (no micro-batch, no result cache) in a copy
+        # of this context, so the worker thread records into this request's profile
+        if profile:
+            with profiling() as request_profile:
+                cleaned_text, analysis_result = await inference_pool.run(
+                    contextvars.copy_context().run, run_analysis, request.complaint_text
+                )
+        # Step 1 & 2: Preprocess text and run AI analysis off the event loop
+        # (repeats of an earlier submission reuse its analysis)
+        elif config.MICRO_BATCH_ENABLED:
+            cleaned_text, analysis_result, cached = await micro_batcher.submit(request.complaint_text)
+        else:
+            [(cleaned_text, analysis_result, cached)] = await inference_pool.run(
+                run_cached_analysis_batch, [request.complaint_text]
+            )
         
         # Step 3: Add additional context
         analysis_result['original_text'] = request.complaint_text
@@ -129,9 +323,13 @@ async def analyze_complaint(
             success=True,
             analysis=analysis_result,
             processed_at=datetime.now().isoformat(),
-            processing_time_ms=round(processing_time, 2)
+            processing_time_ms=round(processing_time, 2),
+            cached=cached,
+            profile=request_profile.as_dict() if request_profile else None
         )
         
+    except PoolSaturatedError as e:
+        raise service_busy(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -148,14 +346,13 @@ async def batch_analyze_complaints(
     Useful for processing existing complaints
     """
     try:
-        results = []
         start_time = datetime.now()
         
-        for complaint in complaints:
-            cleaned_text, features = preprocessor.preprocess(complaint.complaint_text)
-            analysis = classifier.analyze_complaint(cleaned_text, features)
-            analysis['original_text'] = complaint.complaint_text
-            results.append(analysis)
+        texts = [complaint.complaint_text for complaint in complaints]
+        results, stage_timings = await inference_pool.run(batch_engine.analyze, texts)
+        
+        for analysis, text in zip(results, texts):
+            analysis['original_text'] = text
         
         processing_time = (datetime.now() - start_time).total_seconds() * 1000
         
@@ -163,9 +360,12 @@ async def batch_analyze_complaints(
             "success": True,
             "total_complaints": len(complaints),
             "results": results,
-            "processing_time_ms": round(processing_time, 2)
+            "processing_time_ms": round(processing_time, 2),
+            "stage_timings_ms": stage_timings
         }
         
+    except PoolSaturatedError as e:
+        raise service_busy(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -178,20 +378,41 @@ async def get_model_info(api_key: str = Depends(verify_api_key)):
     return {
         "model_name": config.BANGLA_BERT_MODEL,
         "max_length": config.MAX_LENGTH,
-        "device": str(classifier.device),
+        "device": str(classifier.device) if classifier.model_loaded else "not loaded",
+        "mode": "rules" if config.RULES_ONLY else "full",
+        "inference_backend": config.INFERENCE_BACKEND,
+        "models": model_registry.states(),
         "validity_threshold": config.VALIDITY_THRESHOLD,
         "high_priority_threshold": config.HIGH_PRIORITY_THRESHOLD,
         "urgent_priority_threshold": config.URGENT_PRIORITY_THRESHOLD,
         "supported_languages": ["Bengali (বাংলা)", "English", "Banglish (Mixed)"]
     }
 
+@app.get("/api/batcher-stats")
+async def get_batcher_stats(api_key: str = Depends(verify_api_key)):
+    """Micro-batcher queue-wait and batch-size metrics"""
+    return {
+        "enabled": config.MICRO_BATCH_ENABLED,
+        "inference_pending": inference_pool.pending,
+        "inference_queued": inference_pool.queued,
+        **micro_batcher.stats()
+    }
+
+@app.get("/api/cache-stats")
+async def get_cache_stats(api_key: str = Depends(verify_api_key)):
+    """Hit/miss counters of the translation and result caches"""
+    return {**preprocessor.cache_stats(), 'result': result_cache.stats()}
+
 @app.post("/api/test-preprocessing")
 async def test_preprocessing(
     text: str,
     api_key: str = Depends(verify_api_key)
 ):
     """Test text preprocessing"""
-    cleaned_text, features = preprocessor.preprocess(text)
+    try:
+        cleaned_text, features = await inference_pool.run(preprocessor.preprocess, text)
+    except PoolSaturatedError as e:
+        raise service_busy(e)
     return {
         "original_text": text,
         "cleaned_text": cleaned_text,
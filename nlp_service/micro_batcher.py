@@ -0,0 +1,154 @@
+"""
+Dynamic Micro-Batcher
+Groups concurrent single-complaint requests into small batches
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+from inference_pool import InferencePool, PoolSaturatedError
+
+
+class MicroBatcher:
+    """
+    Collects requests for up to `window_ms` milliseconds or `max_batch_size`
+    items, runs them through `process_batch` on the inference pool as one
+    batch, and resolves each caller's future with its own result.
+    """
+
+    def __init__(self, process_batch: Callable[[List[str]], List[Any]], pool: InferencePool,
+                 max_batch_size: int, window_ms: float, max_queue_size: int):
+        self.process_batch = process_batch
+        self.pool = pool
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000
+        self.max_queue_size = max_queue_size
+
+        self._queue: asyncio.Queue = None
+        self._task: asyncio.Task = None
+        self._inflight = set()
+
+        # Metrics
+        self.total_batches = 0
+        self.total_items = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Start the collector task (must run inside the server's event loop)"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """
+        Stop collecting: requests not yet dispatched (queued, or in the batch
+        being collected) fail with PoolSaturatedError; dispatched batches finish
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._fail([self._queue.get_nowait()])
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    @staticmethod
+    def _fail(batch: List[tuple]):
+        error = PoolSaturatedError("Micro-batcher is shutting down")
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def submit(self, text: str) -> Any:
+        """Queue one text and wait for its result"""
+        if self._task is None:
+            raise PoolSaturatedError("Micro-batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise PoolSaturatedError(
+                f"Micro-batch queue is full ({self.max_queue_size} requests)"
+            )
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.window
+
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Stopped mid-collection: don't leave these callers waiting
+                self._fail(batch)
+                raise
+
+            # Dispatch without waiting so the next batch can start collecting
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[tuple]):
+        dispatched_at = time.perf_counter()
+        self._record(len(batch), [(dispatched_at - queued_at) * 1000 for _, _, queued_at in batch])
+
+        texts = [text for text, _, _ in batch]
+        try:
+            results = await self.pool.run(self.process_batch, texts)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, batch_size: int, waits_ms: List[float]):
+        self.total_batches += 1
+        self.total_items += batch_size
+        self.batch_size_histogram[batch_size] = self.batch_size_histogram.get(batch_size, 0) + 1
+        self.total_wait_ms += sum(waits_ms)
+        self.max_wait_ms = max(self.max_wait_ms, max(waits_ms))
+        self._recent_waits.extend(waits_ms)
+
+    def stats(self) -> Dict:
+        """Queue-wait and batch-size metrics for tuning window/size"""
+        recent = sorted(self._recent_waits)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            'max_batch_size': self.max_batch_size,
+            'window_ms': self.window * 1000,
+            'queue_size': self.queue_size,
+            'total_batches': self.total_batches,
+            'total_items': self.total_items,
+            'avg_batch_size': round(self.total_items / self.total_batches, 2) if self.total_batches else 0.0,
+            'batch_size_histogram': dict(sorted(self.batch_size_histogram.items())),
+            'avg_queue_wait_ms': round(self.total_wait_ms / self.total_items, 3) if self.total_items else 0.0,
+            'p95_queue_wait_ms': round(p95, 3),
+            'max_queue_wait_ms': round(self.max_wait_ms, 3)
+        }
@@ -0,0 +1,218 @@
+"""
+Lazy Model Registry
+Transformer models are loaded on first real use (or by a background warm-up)
+instead of at import time, and never in rules-only mode. Each model has a
+PyTorch loader (the reference) and an ONNX Runtime loader for the int8 models
+written by export_onnx.py; INFERENCE_BACKEND picks one.
+"""
+
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List
+
+from config import config
+
+BANGLISHBERT_MODEL = config.BANGLISHBERT_MODEL
+
+# Models the HTTP service calls, and so the only ones it warms up. None today:
+# the analysis endpoints run the rule pipeline only. BanglishBERT is loaded by
+# the batch tools that translate (rejudge_complaints.py), mBERT on first use
+SERVICE_MODELS: List[str] = []
+
+# Intra-op threads for inference (0 = library default), see configure_threads()
+_intra_op_threads = 0
+
+
+class ModelDisabledError(RuntimeError):
+    """Raised when a model is requested while running in rules-only mode"""
+
+
+class LazyModel:
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self._loader = loader
+        self._value = None
+        self._lock = threading.Lock()
+        self.state = 'disabled' if config.RULES_ONLY else 'not_loaded'
+        self.error = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+    def get(self) -> Any:
+        """Return the loaded model, loading it on first call (thread-safe)"""
+        if self._value is not None:
+            return self._value
+        if config.RULES_ONLY:
+            raise ModelDisabledError(f"Model '{self.name}' is disabled in rules-only mode")
+
+        with self._lock:
+            if self._value is None:
+                if self.state == 'failed':
+                    raise RuntimeError(f"Model '{self.name}' failed to load: {self.error}")
+                self.state = 'loading'
+                try:
+                    self._value = self._loader()
+                    self.state = 'loaded'
+                except Exception as e:
+                    self.state = 'failed'
+                    self.error = str(e)
+                    raise
+        return self._value
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._models: Dict[str, LazyModel] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> LazyModel:
+        self._models[name] = LazyModel(name, loader)
+        return self._models[name]
+
+    def get(self, name: str) -> Any:
+        return self._models[name].get()
+
+    def is_loaded(self, name: str) -> bool:
+        return self._models[name].loaded
+
+    def states(self) -> Dict[str, str]:
+        """Load state of every registered model"""
+        return {name: model.state for name, model in self._models.items()}
+
+    def warm_up(self, names: List[str] = None):
+        """Load models now (default: all); failures are reported, not raised"""
+        for name in names if names is not None else list(self._models):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Warning: warm-up of '{name}' failed: {e}")
+
+    def warm_up_in_background(self, names: List[str] = None) -> threading.Thread:
+        """Load models on a daemon thread while the caller keeps serving"""
+        thread = threading.Thread(target=self.warm_up, args=(names,), name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+
+def configure_threads(threads: int):
+    """
+    Pin intra-op threads per process (e.g. per pre-forked worker): applied to
+    torch now or when it is first loaded, and to ONNX Runtime sessions created later
+    """
+    global _intra_op_threads
+    _intra_op_threads = max(0, threads)
+    if 'torch' in sys.modules:
+        _apply_torch_threads()
+
+
+def _apply_torch_threads():
+    if _intra_op_threads:
+        import torch
+        torch.set_num_threads(_intra_op_threads)
+
+
+def _select_device():
+    import torch
+    _apply_torch_threads()
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+def load_mbert() -> Dict[str, Any]:
+    """Load mBERT (Multilingual BERT) model and tokenizer"""
+    from transformers import AutoTokenizer, AutoModel
+
+    print(f"Loading mBERT model: {config.BANGLA_BERT_MODEL}")
+    tokenizer = AutoTokenizer.from_pretrained(config.BANGLA_BERT_MODEL)
+    model = AutoModel.from_pretrained(config.BANGLA_BERT_MODEL)
+
+    device = _select_device()
+    model.to(device)
+    model.eval()
+
+    print(f"Model loaded successfully on {device}")
+    return {'tokenizer': tokenizer, 'model': model, 'device': device, 'backend': 'torch'}
+
+
+def load_banglishbert() -> Dict[str, Any]:
+    """Load BanglishBERT seq2seq model for Banglish to Bengali translation"""
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+    print("Loading BanglishBERT model...")
+    tokenizer = AutoTokenizer.from_pretrained(BANGLISHBERT_MODEL)
+    model = AutoModelForSeq2SeqLM.from_pretrained(BANGLISHBERT_MODEL)
+
+    # Move to GPU if available
+    device = _select_device()
+    model.to(device)
+    model.eval()
+
+    print(f"BanglishBERT loaded successfully on {device}")
+    return {'tokenizer': tokenizer, 'model': model, 'device': device, 'backend': 'torch'}
+
+
+def onnx_model_dir(name: str) -> str:
+    """Directory of an exported model (see export_onnx.py)"""
+    path = os.path.join(config.ONNX_MODEL_DIR, name)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No ONNX export of '{name}' in {path} (run: python export_onnx.py --models {name})")
+    return path
+
+
+def _onnx_session_options():
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if _intra_op_threads:
+        options.intra_op_num_threads = _intra_op_threads
+        options.inter_op_num_threads = 1
+    return options
+
+
+def load_mbert_onnx() -> Dict[str, Any]:
+    """mBERT through ONNX Runtime; same call interface as the PyTorch model"""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+
+    path = onnx_model_dir('mbert')
+    print(f"Loading mBERT (ONNX Runtime) from {path}")
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    model = ORTModelForFeatureExtraction.from_pretrained(
+        path, session_options=_onnx_session_options(), provider="CPUExecutionProvider"
+    )
+    print("Model loaded successfully (ONNX Runtime, CPU)")
+    return {'tokenizer': tokenizer, 'model': model, 'device': model.device, 'backend': 'onnx'}
+
+
+def load_banglishbert_onnx() -> Dict[str, Any]:
+    """BanglishBERT through ONNX Runtime; generate() works as with PyTorch"""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer
+
+    path = onnx_model_dir('banglishbert')
+    print(f"Loading BanglishBERT (ONNX Runtime) from {path}")
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        path, session_options=_onnx_session_options(), provider="CPUExecutionProvider"
+    )
+    print("BanglishBERT loaded successfully (ONNX Runtime, CPU)")
+    return {'tokenizer': tokenizer, 'model': model, 'device': model.device, 'backend': 'onnx'}
+
+
+def backend_loader(loaders: Dict[str, Callable[[], Any]]) -> Callable[[], Any]:
+    """Loader that calls the one registered for INFERENCE_BACKEND"""
+    def load():
+        loader = loaders.get(config.INFERENCE_BACKEND)
+        if loader is None:
+            raise ValueError(
+                f"Unknown INFERENCE_BACKEND '{config.INFERENCE_BACKEND}' (use {', '.join(loaders)})"
+            )
+        return loader()
+    return load
+
+
+model_registry = ModelRegistry()
+model_registry.register('mbert', backend_loader({'torch': load_mbert, 'onnx': load_mbert_onnx}))
+model_registry.register('banglishbert', backend_loader({'torch': load_banglishbert, 'onnx': load_banglishbert_onnx}))
@@ -4,41 +4,39 @@ Handles text normalization, language detection, and cleaning
 Uses BanglishBERT model for advanced Banglish to Bengali translation
 """
 
-import re
+import unicodedata
 import emoji
-import difflib
 from langdetect import detect, LangDetectException
-from typing import Dict, Tuple
-from banglish_dict import BANGLISH_MARKERS_SET, BANGLISH_TO_BN
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
+from typing import Dict, List, Optional, Tuple
+from analysis_context import AnalysisContext
+from banglish_dict import BANGLISH_MARKERS_SET, BANGLISH_TO_BN, get_fuzzy_index
+from config import config
+from lru_cache import LRUCache, MISSING
+from metrics import timed_stage
+import profiling
+from model_registry import model_registry
+from text_patterns import (
+    URL_PATTERN, EMAIL_PATTERN, REPEATED_PUNCTUATION, DIGIT, ASCII_DIGIT,
+    BENGALI_CHAR, REPEATED_RUN, EMOJI_CHARS, char_profile
+)
 
 class TextPreprocessor:
-    def __init__(self, use_banglishbert=True):
+    def __init__(self, use_banglishbert=True, translation_cache_path: Optional[str] = None):
         # Banglish to Bengali markers and full mapping
         self.banglish_markers = BANGLISH_MARKERS_SET
         self.banglish_to_bn = BANGLISH_TO_BN
         
         # BanglishBERT model for advanced translation
-        self.use_banglishbert = use_banglishbert
-        self.banglishbert_model = None
-        self.banglishbert_tokenizer = None
+        # Loaded by the model registry on the first translation, never in rules-only mode
+        self.use_banglishbert = use_banglishbert and not config.RULES_ONLY
         
-        if use_banglishbert:
-            try:
-                print("Loading BanglishBERT model...")
-                self.banglishbert_tokenizer = AutoTokenizer.from_pretrained("csebuetnlp/banglishbert")
-                self.banglishbert_model = AutoModelForSeq2SeqLM.from_pretrained("csebuetnlp/banglishbert")
-                
-                # Move to GPU if available
-                self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-                self.banglishbert_model.to(self.device)
-                self.banglishbert_model.eval()
-                print(f"BanglishBERT loaded successfully on {self.device}")
-            except Exception as e:
-                print(f"Warning: Failed to load BanglishBERT model: {e}")
-                print("Falling back to dictionary-based translation")
-                self.use_banglishbert = False
+        # Translation caches: whole sentences (optionally persisted) and single tokens
+        self.translation_cache = LRUCache(
+            config.TRANSLATION_CACHE_SIZE,
+            persistent_path=translation_cache_path or config.TRANSLATION_CACHE_PATH or None,
+            namespace='translation'
+        )
+        self.token_cache = LRUCache(config.TOKEN_CACHE_SIZE)
         
         # Bengali number to English number mapping
         self.bengali_to_english_nums = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
@@ -84,67 +82,208 @@ class TextPreprocessor:
             'expire', 'expired', 'rotten', 'smell', 'broken', 'damaged'
         }
 
+    def _load_banglishbert(self):
+        """Return the BanglishBERT bundle, or None to use the dictionary fallback"""
+        if not self.use_banglishbert:
+            return None
+        try:
+            return model_registry.get('banglishbert')
+        except Exception as e:
+            print(f"Warning: Failed to load BanglishBERT model: {e}")
+            print("Falling back to dictionary-based translation")
+            self.use_banglishbert = False
+            return None
+    
+    def translation_backend(self, load: bool = True) -> str:
+        """
+        Backend that Banglish translations will use (loads BanglishBERT if enabled)
+        load=False reports the current state without loading the model
+        """
+        if not load and not model_registry.is_loaded('banglishbert'):
+            return 'dictionary'
+        if self._load_banglishbert() is not None:
+            return self._model_settings()
+        return 'dictionary'
+    
+    @staticmethod
+    def _model_backend() -> str:
+        """Translation backend name of BanglishBERT for the configured inference backend"""
+        if config.INFERENCE_BACKEND == 'torch':
+            return 'banglishbert'
+        return f"banglishbert-{config.INFERENCE_BACKEND}"
+    
+    @classmethod
+    def _model_settings(cls, num_beams: Optional[int] = None) -> str:
+        """
+        BanglishBERT backend plus the generation settings its output depends on
+        (beam count and output token budget), e.g. 'banglishbert:beams=5:tokens=1.5x,min=16'
+        """
+        return (f"{cls._model_backend()}:beams={num_beams or config.TRANSLATION_NUM_BEAMS}"
+                f":tokens={config.TRANSLATION_MAX_NEW_TOKENS_RATIO}x,min={config.TRANSLATION_MIN_NEW_TOKENS}")
+    
+    @staticmethod
+    def _translation_key(text: str) -> str:
+        """Cache key: NFC-normalized text with collapsed whitespace"""
+        return ' '.join(unicodedata.normalize('NFC', text).split())
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the translation caches"""
+        return {
+            'translation': self.translation_cache.stats(),
+            'token': self.token_cache.stats()
+        }
+    
     def convert_banglish_to_bangla(self, text: str) -> str:
         """
         Convert Banglish text to Bengali using BanglishBERT model
         Falls back to dictionary-based translation if model is not available
+        Results are cached per backend on the normalized text
         """
+        return self.convert_banglish_to_bangla_batch([text])[0]
+    
+    def convert_banglish_to_bangla_batch(self, texts: List[str], batch_size: Optional[int] = None,
+                                         num_beams: Optional[int] = None) -> List[str]:
+        """
+        Convert many Banglish texts at once
+        Cache misses are deduplicated and translated together; BanglishBERT
+        generation runs on length-bucketed, per-bucket padded batches.
+        Cached translations are keyed on the backend and generation settings
+        """
+        backend = self._model_settings(num_beams) if self.use_banglishbert else 'dictionary'
+        results: List[Optional[str]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
+        
+        for i, text in enumerate(texts):
+            key = self._translation_key(text)
+            cached = self.translation_cache.get(f"{backend}:{key}")
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(key, []).append(i)
+        
+        if pending:
+            keys = list(pending)
+            sources = [texts[pending[key][0]] for key in keys]
+            translations, backend = self._translate_batch(sources, batch_size, num_beams)
+            for key, bangla_text in zip(keys, translations):
+                self.translation_cache.put(f"{backend}:{key}", bangla_text)
+                for i in pending[key]:
+                    results[i] = bangla_text
+        
+        return results
+    
+    @timed_stage('translation')
+    def _translate_batch(self, texts: List[str], batch_size: Optional[int] = None,
+                         num_beams: Optional[int] = None) -> Tuple[List[str], str]:
+        """Translate without caching. Returns (translations, backend and settings used)"""
         # Use BanglishBERT model if available
-        if self.use_banglishbert and self.banglishbert_model is not None:
+        banglishbert = self._load_banglishbert()
+        if banglishbert is not None:
             try:
-                # Tokenize input
-                inputs = self.banglishbert_tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                
-                # Generate Bengali translation
-                with torch.no_grad():
-                    generated_ids = self.banglishbert_model.generate(
-                        **inputs,
-                        max_length=512,
-                        num_beams=5,
-                        early_stopping=True
-                    )
-                
-                # Decode the output
-                bangla_text = self.banglishbert_tokenizer.decode(generated_ids[0], skip_special_tokens=True)
-                return bangla_text.strip()
-                
+                return self._generate_batch(banglishbert, texts, batch_size, num_beams), self._model_settings(num_beams)
             except Exception as e:
                 print(f"BanglishBERT translation failed: {e}. Falling back to dictionary.")
                 # Fall through to dictionary-based translation
         
-        # Dictionary-based translation (fallback)
+        return [self._translate_dictionary(text) for text in texts], 'dictionary'
+    
+    def _generate_batch(self, banglishbert: Dict, texts: List[str], batch_size: Optional[int] = None,
+                        num_beams: Optional[int] = None) -> List[str]:
+        """
+        BanglishBERT generation over length buckets: inputs are sorted by token
+        length and cut into batches, so each batch pads only to its own
+        longest input and gets an output budget relative to that length
+        """
+        import torch
+        
+        tokenizer = banglishbert['tokenizer']
+        model = banglishbert['model']
+        batch_size = batch_size or config.TRANSLATION_BATCH_SIZE
+        num_beams = num_beams or config.TRANSLATION_NUM_BEAMS
+        
+        lengths = [
+            len(ids) for ids in
+            tokenizer(texts, truncation=True, max_length=config.MAX_LENGTH)['input_ids']
+        ]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+        results: List[Optional[str]] = [None] * len(texts)
+        
+        for start in range(0, len(order), batch_size):
+            bucket = order[start:start + batch_size]
+            
+            # Tokenize input (padded to the longest text of this bucket)
+            inputs = tokenizer(
+                [texts[i] for i in bucket], return_tensors="pt",
+                padding=True, truncation=True, max_length=config.MAX_LENGTH
+            )
+            inputs = {k: v.to(banglishbert['device']) for k, v in inputs.items()}
+            
+            longest = max(lengths[i] for i in bucket)
+            max_new_tokens = min(
+                config.MAX_LENGTH,
+                max(config.TRANSLATION_MIN_NEW_TOKENS, int(longest * config.TRANSLATION_MAX_NEW_TOKENS_RATIO))
+            )
+            
+            # Generate Bengali translation
+            with torch.no_grad():
+                generated_ids = model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    num_beams=num_beams,
+                    do_sample=False,
+                    early_stopping=num_beams > 1
+                )
+            
+            profiling.count('generated_tokens', generated_ids.numel())
+            profiling.count('beam_tokens', generated_ids.numel() * num_beams)
+            
+            # Decode the output
+            decoded = tokenizer.batch_decode(generated_ids, skip_special_tokens=True)
+            for i, bangla_text in zip(bucket, decoded):
+                results[i] = bangla_text.strip()
+        
+        return results
+    
+    def _translate_dictionary(self, text: str) -> str:
+        """Dictionary-based translation (fallback)"""
         words = text.split()
         converted_words = []
         
         for word in words:
-            word_lower = word.lower()
-            
-            # 1. Direct match
-            if word_lower in self.banglish_to_bn:
-                converted_words.append(self.banglish_to_bn[word_lower])
-                continue
-                
-            # 2. Check if it's already Bengali or number
-            if re.match(r'[\u0980-\u09FF]', word) or re.match(r'[0-9]', word):
-                 converted_words.append(word)
-                 continue
-
-            # 3. Fuzzy match (Spell check) if length of word is reasonable
-            # Find close matches in our dictionary keys
-            if len(word) >= 3:
-                matches = difflib.get_close_matches(word_lower, self.banglish_markers, n=1, cutoff=0.85)
-                
-                if matches:
-                    close_match = matches[0]
-                    converted_words.append(self.banglish_to_bn[close_match])
-                else:
-                    converted_words.append(word)
-            else:
-                converted_words.append(word)
+            translated = self._translate_word(word)
+            converted_words.append(word if translated is None else translated)
                 
         return ' '.join(converted_words)
+    
+    def _translate_word(self, word: str) -> Optional[str]:
+        """Dictionary/fuzzy translation of one word, None to keep it as is (cached)"""
+        word_lower = word.lower()
+        cached = self.token_cache.get(word_lower, MISSING)
+        if cached is not MISSING:
+            return cached
         
+        translated = None
+        profiling.count('dictionary_lookups')
+        
+        # 1. Direct match
+        if word_lower in self.banglish_to_bn:
+            translated = self.banglish_to_bn[word_lower]
+            
+        # 2. Check if it's already Bengali or number
+        elif BENGALI_CHAR.match(word) or ASCII_DIGIT.match(word):
+            translated = None
+        
+        # 3. Fuzzy match (Spell check) if length of word is reasonable
+        # Find close matches in our dictionary keys (indexed, same results as difflib)
+        elif len(word) >= 3:
+            close_match = get_fuzzy_index().best_match(word_lower)
+            if close_match:
+                translated = self.banglish_to_bn[close_match]
+        
+        self.token_cache.put(word_lower, translated)
+        return translated
+        
+    @timed_stage('detect_language')
     def detect_language(self, text: str) -> str:
         """
         Detect language of the text
@@ -152,12 +291,11 @@ class TextPreprocessor:
         """
         try:
             # Check if text contains Bengali characters
-            bengali_chars = re.findall(r'[\u0980-\u09FF]', text)
-            english_chars = re.findall(r'[a-zA-Z]', text)
+            profile = char_profile(text)
             
             text_len = max(len(text), 1)
-            bengali_ratio = len(bengali_chars) / text_len
-            english_ratio = len(english_chars) / text_len
+            bengali_ratio = profile['bengali'] / text_len
+            english_ratio = profile['english'] / text_len
             
             # Case 1: Mixed Scripts (Bengali + English characters)
             if bengali_ratio > 0.15 and english_ratio > 0.15:
@@ -179,6 +317,7 @@ class TextPreprocessor:
                 # Count matches from loaded dictionary + hardcoded markers for safety
                 # Exclude common English words from Banglish count even if they exist in dict
                 banglish_count = sum(1 for w in words if w in self.banglish_markers and w not in self.english_stopwords)
+                profiling.count('dictionary_lookups', len(words))
                 total_words = len(words)
                 
                 # If significant portion matches Banglish words (and NOT English structure)
@@ -198,32 +337,30 @@ class TextPreprocessor:
         # Convert Bengali numbers to English
         text = text.translate(self.bengali_to_english_nums)
         
-        # Normalize Unicode (Bengali has various representations)
-        # ো vs ো (combined vs separate)
-        text = re.sub(r'া', 'া', text)
-        text = re.sub(r'ি', 'ি', text)
-        
         # Remove extra whitespaces
         text = ' '.join(text.split())
         
         return text
     
+    @timed_stage('clean_text')
     def clean_text(self, text: str) -> str:
         """Clean and normalize text"""
         # Convert to lowercase (for English parts)
         # Keep Bengali as-is
         
         # Remove URLs
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+        profiling.count('regex_scans', 3)
+        text = URL_PATTERN.sub('', text)
         
         # Remove email addresses
-        text = re.sub(r'\S+@\S+', '', text)
+        text = EMAIL_PATTERN.sub('', text)
         
-        # Convert emojis to text
-        text = emoji.demojize(text, language='en')
+        # Convert emojis to text (skipped when no emoji character is present)
+        if not EMOJI_CHARS.isdisjoint(text):
+            text = emoji.demojize(text, language='en')
         
         # Remove excessive punctuation
-        text = re.sub(r'([!?.]){2,}', r'\1', text)
+        text = REPEATED_PUNCTUATION.sub(r'\1', text)
         
         # Remove extra whitespaces
         text = ' '.join(text.split())
@@ -235,46 +372,60 @@ class TextPreprocessor:
     
     def extract_features(self, text: str) -> Dict:
         """Extract features from text for analysis"""
+        return self.prepare(text)[1]
+    
+    def prepare(self, text: str, cleaned_text: Optional[str] = None) -> Tuple[AnalysisContext, Dict]:
+        """
+        Clean text once and extract its features
+        cleaned_text: clean_text(text) if the caller already has it
+        Returns: (analysis context of the cleaned text, features_dict)
+        """
         language = self.detect_language(text)
-        cleaned_text = self.clean_text(text)
+        if cleaned_text is None:
+            cleaned_text = self.clean_text(text)
+        context = AnalysisContext(cleaned_text)
         
         # Count features
-        words = cleaned_text.split()
+        words = context.tokens
         word_count = len(words)
         char_count = len(cleaned_text)
         
+        # Character classes, counted in one pass
+        profile = context.profile
+        
         # Check for specific markers
-        has_numbers = bool(re.search(r'\d', cleaned_text))
-        has_bengali = bool(re.search(r'[\u0980-\u09FF]', cleaned_text))
-        has_english = bool(re.search(r'[a-zA-Z]', cleaned_text))
+        profiling.count('regex_scans', 2)
+        has_numbers = bool(DIGIT.search(cleaned_text))
+        has_bengali = profile['bengali'] > 0
+        has_english = profile['english'] > 0
         
         # Punctuation analysis
         exclamation_count = cleaned_text.count('!')
         question_count = cleaned_text.count('?')
         
         # Check for capital letters (indicates urgency/emphasis in English)
-        capital_ratio = sum(1 for c in cleaned_text if c.isupper()) / max(char_count, 1)
+        capital_ratio = sum(map(str.isupper, cleaned_text)) / max(char_count, 1)
         
         # NEW: Gibberish detection features
         # Count repeated characters (like "aaaa" or "xxxx")
-        repeated_char_ratio = len(re.findall(r'(.)\1{2,}', cleaned_text)) / max(char_count, 1)
+        repeated_char_ratio = len(REPEATED_RUN.findall(cleaned_text)) / max(char_count, 1)
         
         # Count consonant clusters without vowels (gibberish indicator)
-        consonant_clusters = len(re.findall(r'[bcdfghjklmnpqrstvwxyz]{4,}', cleaned_text.lower()))
+        consonant_clusters = profile['consonant_clusters']
         
         # Check for meaningful words (both English and Bengali)
         # Common Bengali vowels: া, ি, ী, ু, ূ, ৃ, ে, ৈ, ো, ৌ
-        bengali_vowel_count = len(re.findall(r'[\u09BE\u09BF\u09C0\u09C1\u09C2\u09C3\u09C7\u09C8\u09CB\u09CC]', cleaned_text))
-        vowel_ratio = bengali_vowel_count / max(char_count, 1) if has_bengali else 0
+        vowel_ratio = profile['bengali_vowel_signs'] / max(char_count, 1) if has_bengali else 0
         
         # Check space ratio (gibberish usually lacks proper spacing)
         space_count = cleaned_text.count(' ')
         space_ratio = space_count / max(char_count, 1)
         
         # Average word length (gibberish often has unusual word lengths)
-        avg_word_length = sum(len(word) for word in words) / max(word_count, 1)
+        # (words are joined by single spaces in cleaned_text)
+        avg_word_length = (char_count - max(word_count - 1, 0)) / max(word_count, 1)
         
-        return {
+        return context, {
             'original_text': text,
             'cleaned_text': cleaned_text,
             'language': language,
@@ -303,3 +454,20 @@ class TextPreprocessor:
         """
         features = self.extract_features(text)
         return features['cleaned_text'], features
+    
+    def preprocess_batch(self, texts: List[str]) -> List[Tuple[str, Dict]]:
+        """
+        Preprocess a batch of texts
+        Returns: [(cleaned_text, features_dict), ...] in input order
+        """
+        return [self.preprocess(text) for text in texts]
+    
+    def prepare_batch(self, texts: List[str],
+                      cleaned_texts: Optional[List[str]] = None) -> List[Tuple[AnalysisContext, Dict]]:
+        """
+        Prepare a batch of texts
+        Returns: [(context, features_dict), ...] in input order
+        """
+        if cleaned_texts is None:
+            return [self.prepare(text) for text in texts]
+        return [self.prepare(text, cleaned) for text, cleaned in zip(texts, cleaned_texts)]
@@ -1,122 +1,201 @@
 """
 Batch process complaints through NLP model and update database
+Complaints go to /api/batch-analyze in chunks over a pooled async HTTP client;
+an adaptive limiter decides how many chunks are in flight from the service's
+latency, and results are written back in bulk (COPY + one UPDATE per chunk).
 """
 
-import requests
+import asyncio
+import httpx
 import psycopg2
-from psycopg2.extras import execute_batch
 import os
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import json
 
+from bulk_writer import BulkResultWriter
+from db_stream import stream_rows, chunked
+from rate_limiter import AdaptiveLimiter
+
 load_dotenv()
 
 # Configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "")
-NLP_SERVICE_URL = "http://localhost:8001/api/analyze-complaint"
+NLP_SERVICE_URL = os.getenv("NLP_SERVICE_URL", "http://localhost:8001")
 API_KEY = os.getenv("API_KEY", "your-secret-api-key")
 
-# Batch size for processing
-BATCH_SIZE = 10
+# Complaints per /api/batch-analyze request
+BATCH_SIZE = int(os.getenv("PROCESS_BATCH_SIZE", 32))
 
+# Upper bound on requests in flight (also the HTTP connection pool size);
+# the limiter adapts below it
+MAX_CONCURRENCY = int(os.getenv("PROCESS_CONCURRENCY", 4))
 
-def get_unprocessed_complaints(conn, limit: int = None):
-    """Get complaints that haven't been processed by AI"""
-    
+# Back off when a batch takes longer than this (seconds)
+TARGET_LATENCY = float(os.getenv("PROCESS_TARGET_LATENCY", 10))
+
+MAX_RETRIES = int(os.getenv("PROCESS_MAX_RETRIES", 3))
+REQUEST_TIMEOUT = 120
+
+# The service rejects shorter texts (ComplaintRequest.complaint_text min_length)
+MIN_TEXT_LENGTH = 5
+
+
+UNPROCESSED_FILTER = "FROM complaints WHERE ai_analysis_date IS NULL"
+
+
+def count_unprocessed_complaints(conn) -> int:
     cursor = conn.cursor()
+    cursor.execute(f"SELECT count(*) {UNPROCESSED_FILTER}")
+    count = cursor.fetchone()[0]
+    cursor.close()
+    conn.commit()
+    return count
+
+
+def stream_unprocessed_complaints(read_conn, limit: int = None) -> Iterator[Dict[str, Any]]:
+    """Stream complaints that haven't been processed by AI (server-side cursor)"""
     
-    query = """
+    query = f"""
     SELECT id, description, category, shop_name, product_name
-    FROM complaints
-    WHERE ai_analysis_date IS NULL
+    {UNPROCESSED_FILTER}
     ORDER BY submitted_at DESC
     """
     
     if limit:
         query += f" LIMIT {limit}"
     
-    cursor.execute(query)
-    results = cursor.fetchall()
-    cursor.close()
-    
-    complaints = []
-    for row in results:
-        complaints.append({
+    for row in stream_rows(read_conn, query):
+        yield {
             "id": row[0],
             "description": row[1],
             "category": row[2],
             "shop_name": row[3],
             "product_name": row[4],
-        })
-    
-    return complaints
+        }
 
 
-def analyze_complaint(complaint: Dict[str, Any]) -> Dict[str, Any]:
-    """Send complaint to NLP service for analysis"""
-    
+def is_analyzable(complaint: Dict[str, Any]) -> bool:
+    """False for descriptions the service would reject (NULL or too short)"""
+    text = complaint["description"]
+    return isinstance(text, str) and len(text) >= MIN_TEXT_LENGTH
+
+
+def build_payload(complaint: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "complaint_text": complaint["description"],
+        "product_name": complaint["product_name"],
+        "shop_name": complaint["shop_name"],
+    }
+
+
+def retry_delay(retry_after: Optional[str], attempt: int) -> float:
+    """
+    Seconds to wait from a Retry-After header: delay-seconds or an HTTP-date
+    (RFC 9110); exponential backoff when it can't be parsed
+    """
+    if retry_after is None:
+        return 1.0
     try:
-        payload = {
-            "complaint_text": complaint["description"],
-            "product_name": complaint["product_name"],
-            "shop_name": complaint["shop_name"],
-        }
-        
-        headers = {
-            "X-API-Key": API_KEY,
-            "Content-Type": "application/json"
-        }
-        
-        response = requests.post(NLP_SERVICE_URL, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError, IndexError):
+        return min(30, 2 ** attempt)
+
+
+async def analyze_batch(client: httpx.AsyncClient, limiter: AdaptiveLimiter,
+                        complaints: List[Dict[str, Any]]) -> Tuple[Optional[List[Dict[str, Any]]], float]:
+    """
+    Send a chunk of complaints to the NLP service
+    Returns: (analyses in input order or None on failure, service time in seconds);
+    when the service rejects the chunk, complaints are resent one by one and
+    the rejected ones get None
+    """
+    payload = [build_payload(complaint) for complaint in complaints]
+    rejected = False
+    
+    for attempt in range(MAX_RETRIES + 1):
+        started = await limiter.acquire()
+        overloaded = False
+        retry_after = None
+        try:
+            response = await client.post("/api/batch-analyze", json=payload)
+            
+            # Service busy: back off and retry
+            if response.status_code in (429, 503):
+                overloaded = True
+                retry_after = retry_delay(response.headers.get("Retry-After"), attempt)
+                continue
+            
+            # Validation error: one bad complaint must not fail its neighbours
+            if response.status_code == 422 and len(complaints) > 1:
+                rejected = True
+                break
+            
+            response.raise_for_status()
+            result = response.json()
+            return result["results"], result.get("processing_time_ms", 0) / 1000
         
-        result = response.json()
-        # Extract analysis from response
-        return result.get("analysis", result)
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            overloaded = True
+            retry_after = min(30, 2 ** attempt)
+            print(f"⚠️ Request failed ({e.__class__.__name__}), attempt {attempt + 1}/{MAX_RETRIES + 1}")
+        except Exception as e:
+            print(f"❌ Error analyzing batch starting at complaint {complaints[0]['id']}: {e}")
+            return None, 0.0
+        finally:
+            await limiter.release(started, overloaded, retry_after)
     
-    except Exception as e:
-        print(f"❌ Error analyzing complaint {complaint['id']}: {e}")
-        return None
+    if rejected:
+        print(f"⚠️ Batch starting at complaint {complaints[0]['id']} rejected (422), sending one by one")
+        singles = await asyncio.gather(*(analyze_batch(client, limiter, [complaint]) for complaint in complaints))
+        return [analyses[0] if analyses else None for analyses, _ in singles], sum(t for _, t in singles)
+    
+    print(f"❌ Giving up on batch starting at complaint {complaints[0]['id']} after {MAX_RETRIES + 1} attempts")
+    return None, 0.0
 
 
-def update_complaint_with_ai(conn, complaint_id: int, analysis: Dict[str, Any], processing_time: float):
-    """Update complaint with AI analysis results"""
-    
-    cursor = conn.cursor()
+# Columns written for each analyzed complaint, in analysis_values() order
+ANALYSIS_COLUMNS = [
+    'validity_score',
+    'is_valid',
+    'validity_reasons',
+    'ai_priority_score',
+    'ai_priority_level',
+    'priority_reasons',
+    'sentiment_score',
+    'sentiment',
+    'emotion_intensity',
+    'ai_category',
+    'ai_category_confidence',
+    'matched_keywords',
+    'ai_summary',
+    'detected_language',
+    'ai_analysis_date',
+    'ai_processing_time_ms',
+    'ai_full_analysis',
+]
+
+
+def analysis_values(analysis: Dict[str, Any], processing_time: float) -> list:
+    """Column values for one analyzed complaint"""
     
     # Extract data from analysis
     validity = analysis.get("validity", {})
     priority = analysis.get("priority", {})
-    severity = analysis.get("severity", {})
     sentiment = analysis.get("sentiment", {})
     category = analysis.get("category", {})
     
-    update_query = """
-    UPDATE complaints SET
-        validity_score = %s,
-        is_valid = %s,
-        validity_reasons = %s,
-        ai_priority_score = %s,
-        ai_priority_level = %s,
-        priority_reasons = %s,
-        sentiment_score = %s,
-        sentiment = %s,
-        emotion_intensity = %s,
-        ai_category = %s,
-        ai_category_confidence = %s,
-        matched_keywords = %s,
-        ai_summary = %s,
-        detected_language = %s,
-        ai_analysis_date = %s,
-        ai_processing_time_ms = %s,
-        ai_full_analysis = %s
-    WHERE id = %s
-    """
-    
-    cursor.execute(update_query, (
+    return [
         validity.get("validity_score", 0),
         validity.get("is_valid", False),
         validity.get("reasons", []),
@@ -134,90 +213,145 @@ def update_complaint_with_ai(conn, complaint_id: int, analysis: Dict[str, Any],
         datetime.now(),
         int(processing_time * 1000),
         json.dumps(analysis),
-        complaint_id,
-    ))
+    ]
+
+
+async def process_batch(client: httpx.AsyncClient, limiter: AdaptiveLimiter, writer: BulkResultWriter,
+                        write_lock: asyncio.Lock, complaints: list) -> Tuple[int, int]:
+    """Analyze one chunk and queue its results for write-back"""
     
-    conn.commit()
-    cursor.close()
+    # Descriptions the service would reject fail alone, as before batching
+    skipped = [complaint for complaint in complaints if not is_analyzable(complaint)]
+    for complaint in skipped:
+        print(f"❌ Complaint {complaint['id']}: description missing or shorter than {MIN_TEXT_LENGTH} characters")
+    complaints = [complaint for complaint in complaints if is_analyzable(complaint)]
+    if not complaints:
+        return 0, len(skipped)
+    
+    analyses, service_time = await analyze_batch(client, limiter, complaints)
+    if analyses is None:
+        return 0, len(complaints) + len(skipped)
+    
+    # The service reports time for the whole chunk; attribute it evenly
+    processing_time = service_time / max(len(complaints), 1)
+    rows = [
+        (complaint["id"], analysis_values(analysis, processing_time))
+        for complaint, analysis in zip(complaints, analyses)
+        if analysis
+    ]
+    
+    # One writer at a time on the shared connection, off the event loop
+    try:
+        async with write_lock:
+            await asyncio.to_thread(writer.add_many, rows)
+    except Exception as e:
+        print(f"❌ Failed to save batch starting at complaint {complaints[0]['id']}: {e}")
+        return 0, len(complaints) + len(skipped)
+    
+    return len(rows), len(complaints) - len(rows) + len(skipped)
 
 
-def process_batch(conn, complaints: list):
-    """Process a batch of complaints"""
+async def process_all(conn, batches: Iterator[list], total: int) -> Tuple[int, int, Dict[str, Any]]:
+    """
+    Process a stream of complaint batches with bounded, latency-adaptive concurrency
+    Batches are pulled from the stream only as fast as they are processed
+    """
     
-    print(f"🔄 Processing batch of {len(complaints)} complaints...")
+    limiter = AdaptiveLimiter(MAX_CONCURRENCY, TARGET_LATENCY)
+    writer = BulkResultWriter(conn, 'complaints', ANALYSIS_COLUMNS)
+    write_lock = asyncio.Lock()
+    total_batches = (total + BATCH_SIZE - 1) // BATCH_SIZE
     
-    success_count = 0
-    failed_count = 0
+    total_success = 0
+    total_failed = 0
+    done = 0
+    pending = set()
     
-    for complaint in complaints:
-        start_time = time.time()
-        
-        analysis = analyze_complaint(complaint)
-        
-        processing_time = time.time() - start_time
-        
-        if analysis:
-            update_complaint_with_ai(conn, complaint["id"], analysis, processing_time)
-            success_count += 1
-            print(f"✅ Processed complaint #{complaint['id']} ({processing_time:.2f}s)")
-        else:
-            failed_count += 1
-            print(f"❌ Failed to process complaint #{complaint['id']}")
-        
-        # Small delay to avoid overwhelming the service
-        time.sleep(0.1)
+    async with httpx.AsyncClient(
+        base_url=NLP_SERVICE_URL,
+        headers={"X-API-Key": API_KEY},
+        timeout=REQUEST_TIMEOUT,
+        limits=httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY)
+    ) as client:
+        exhausted = False
+        while pending or not exhausted:
+            # Keep a couple of batches queued per request slot; no more are read
+            while not exhausted and len(pending) < 2 * MAX_CONCURRENCY:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    exhausted = True
+                else:
+                    pending.add(asyncio.create_task(process_batch(client, limiter, writer, write_lock, batch)))
+            if not pending:
+                break
+            
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                success, failed = task.result()
+                total_success += success
+                total_failed += failed
+                done += 1
+                stats = limiter.stats()
+                print(f"📦 Batch {done}/{total_batches}: ✅ {success} ❌ {failed} "
+                      f"(concurrency {stats['limit']}, latency {stats['latency_ewma_s']}s)")
     
-    return success_count, failed_count
+    # Write the last partial chunk; rows the database rejected count as failed
+    await asyncio.to_thread(writer.close)
+    total_success -= len(writer.failed_keys)
+    total_failed += len(writer.failed_keys)
+    print(f"💾 Write-back: {writer.stats()}")
+    
+    return total_success, total_failed, limiter.stats()
 
 
 def main():
     """Main processing function"""
     
     print("🚀 Starting batch complaint processing...")
-    print(f"📡 NLP Service: {NLP_SERVICE_URL}")
+    print(f"📡 NLP Service: {NLP_SERVICE_URL}/api/batch-analyze")
+    print(f"⚙️ Batch size {BATCH_SIZE}, max concurrency {MAX_CONCURRENCY}, target latency {TARGET_LATENCY}s")
     
     # Test NLP service
     try:
-        response = requests.get("http://localhost:8001/health", timeout=5)
+        response = httpx.get(f"{NLP_SERVICE_URL}/health", timeout=5)
         print(f"✅ NLP Service is running")
     except Exception as e:
         print(f"❌ NLP Service is not available: {e}")
         print(f"💡 Please start the service first: cd nlp_service && ./start_service.sh")
         return
     
-    # Connect to database
+    # Connect to database (complaints are streamed on a separate read connection)
     print(f"🔌 Connecting to database...")
     conn = psycopg2.connect(DATABASE_URL)
+    read_conn = psycopg2.connect(DATABASE_URL)
+    read_conn.set_session(readonly=True)
     
-    # Get unprocessed complaints
-    complaints = get_unprocessed_complaints(conn)
-    print(f"📊 Found {len(complaints)} unprocessed complaints")
+    # Count unprocessed complaints
+    total = count_unprocessed_complaints(conn)
+    print(f"📊 Found {total} unprocessed complaints")
     
-    if not complaints:
+    if not total:
         print("✅ All complaints are already processed!")
         conn.close()
+        read_conn.close()
         return
     
-    # Process in batches
-    total_success = 0
-    total_failed = 0
-    
-    for i in range(0, len(complaints), BATCH_SIZE):
-        batch = complaints[i:i + BATCH_SIZE]
-        print(f"\n📦 Batch {i // BATCH_SIZE + 1}/{(len(complaints) + BATCH_SIZE - 1) // BATCH_SIZE}")
-        
-        success, failed = process_batch(conn, batch)
-        total_success += success
-        total_failed += failed
+    start_time = time.time()
+    batches = chunked(stream_unprocessed_complaints(read_conn), BATCH_SIZE)
+    total_success, total_failed, limiter_stats = asyncio.run(process_all(conn, batches, total))
+    elapsed = time.time() - start_time
     
     conn.close()
+    read_conn.close()
     
     print(f"\n" + "="*50)
     print(f"✅ Processing complete!")
-    print(f"📊 Total: {len(complaints)}")
+    print(f"📊 Total: {total_success + total_failed}")
     print(f"✅ Success: {total_success}")
     print(f"❌ Failed: {total_failed}")
-    print(f"📈 Success Rate: {(total_success / len(complaints) * 100):.2f}%")
+    print(f"📈 Success Rate: {(total_success / max(total_success + total_failed, 1) * 100):.2f}%")
+    print(f"⚡ Throughput: {(total_success + total_failed) / max(elapsed, 1e-9):.1f} complaints/s ({elapsed:.1f}s)")
+    print(f"🎛️ Limiter: {limiter_stats}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+"""
+Per-Request Profiling
+Opt-in stage timings and work counters for a single request. The active
+profile lives in a context variable, so only code running inside profiling()
+(or in a copy of its context, e.g. on the inference pool) records anything;
+with no active profile each instrumentation point costs one ContextVar lookup.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+_active: ContextVar[Optional['RequestProfile']] = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, list] = {}  # name -> [calls, seconds]
+        self.counters: Dict[str, int] = {}
+
+    def add_stage(self, name: str, seconds: float):
+        stage = self.stages.get(name)
+        if stage is None:
+            self.stages[name] = [1, seconds]
+        else:
+            stage[0] += 1
+            stage[1] += seconds
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'stages': {
+                name: {'calls': calls, 'total_ms': round(seconds * 1000, 3)}
+                for name, (calls, seconds) in self.stages.items()
+            },
+            'counters': dict(sorted(self.counters.items()))
+        }
+
+
+def active_profile() -> Optional[RequestProfile]:
+    return _active.get()
+
+
+def count(name: str, amount: int = 1):
+    """Add to a counter of the active profile (no-op without one)"""
+    profile = _active.get()
+    if profile is not None:
+        profile.count(name, amount)
+
+
+@contextmanager
+def profiling() -> Iterator[RequestProfile]:
+    """Record stages and counters of the enclosed work into a new profile"""
+    profile = RequestProfile()
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
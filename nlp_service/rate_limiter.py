@@ -0,0 +1,85 @@
+"""
+Adaptive Rate Limiter
+AIMD concurrency control for clients of the NLP service: the number of
+requests allowed in flight grows by about one per round of fast responses and
+is halved when responses get slower than the target latency or the service
+answers 429/503 (honouring Retry-After).
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class AdaptiveLimiter:
+    def __init__(self, max_concurrency: int, target_latency: float,
+                 min_concurrency: int = 1, decrease_factor: float = 0.5):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+
+        # Start low and let fast responses open the window
+        self.limit = float(self.min_concurrency)
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.increases = 0
+        self.decreases = 0
+
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        """Wait for a free slot. Returns the start time to pass to release()"""
+        async with self._condition:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < int(self.limit):
+                    break
+                await self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def release(self, started: float, overloaded: bool = False,
+                      retry_after: Optional[float] = None):
+        """Free the slot and adapt the limit to how the request went"""
+        now = time.monotonic()
+        latency = now - started
+
+        async with self._condition:
+            self.in_flight -= 1
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+
+            if overloaded or latency > self.target_latency:
+                # Back off once per round trip: requests that were already in
+                # flight at the last decrease don't shrink the window again
+                if started >= self._last_decrease:
+                    self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                    self.decreases += 1
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+            elif self.limit < self.max_concurrency:
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+                self.increases += 1
+
+            self._condition.notify_all()
+
+    def stats(self) -> Dict:
+        return {
+            'limit': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'latency_ewma_s': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            'increases': self.increases,
+            'decreases': self.decreases
+        }
@@ -1,10 +1,22 @@
+import argparse
+import gc
+import multiprocessing
 import os
+import queue
+import time
 import psycopg2
 import json
 import logging
 from dotenv import load_dotenv
 from classifier import ComplaintClassifier
 from preprocessor import TextPreprocessor
+from banglish_dict import get_fuzzy_index
+from config import config
+from bulk_writer import BulkResultWriter
+from db_stream import chunked
+from job_checkpoint import CheckpointStore, ensure_checkpoint_table
+from model_registry import configure_threads
+from versioning import CONTENT_HASH_SQL, content_hash, pipeline_fingerprint
 
 # Configure logging
 logging.basicConfig(
@@ -18,12 +30,333 @@ logging.basicConfig(
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Rows preprocessed together so their Banglish translations run as one batch
+CHUNK_SIZE = int(os.getenv("REJUDGE_CHUNK_SIZE", 64))
+# Rows per keyset page; each page is committed together with its checkpoint
+PAGE_SIZE = int(os.getenv("REJUDGE_PAGE_SIZE", 1000))
+JOB_NAME = 'rejudge'
+# Worker processes for --workers (1 = sequential)
+WORKERS = int(os.getenv("REJUDGE_WORKERS", 1))
+# Id ranges per worker; more ranges than workers keeps the pool busy when ranges are uneven
+RANGES_PER_WORKER = int(os.getenv("REJUDGE_RANGES_PER_WORKER", 4))
+TABLES = ['complaints', 'complaints_with_ai']
 
 def get_columns(cur, table_name):
     cur.execute(f"SELECT column_name FROM information_schema.columns WHERE table_name = '{table_name}';")
     return {row[0] for row in cur.fetchall()}
 
-def rejudge():
+def analysis_fields(analysis):
+    """Map analysis fields to DB columns"""
+    validity = analysis.get("validity", {})
+    priority = analysis.get("priority", {})
+    sentiment = analysis.get("sentiment", {})
+    category = analysis.get("category", {})
+    
+    return {
+        'validity_score': validity.get("validity_score", 0),
+        'is_valid': validity.get("is_valid", False),
+        'validity_reasons': validity.get("reasons", []),
+        'ai_priority_score': priority.get("priority_score", 0),
+        'ai_priority_level': priority.get("priority_level", "Low"),
+        'priority_reasons': priority.get("reasons", []),
+        'sentiment_score': sentiment.get("sentiment_score", 0),
+        'sentiment': sentiment.get("sentiment", "neutral"),
+        'emotion_intensity': sentiment.get("emotion_intensity", "neutral"),
+        'ai_category': category.get("category", "Other"),
+        'ai_category_confidence': str(category.get("confidence", 0)),
+        'matched_keywords': 1 if category.get("matched_keywords") else 0, # Integer count or list? DB says integer usually, but let's check. check_tables said integer.
+        'ai_summary': analysis.get("summary", ""),
+        'detected_language': analysis.get("language", "en"),
+        'ai_full_analysis': json.dumps(analysis)
+    }
+
+ANALYSIS_COLUMNS = list(analysis_fields({}).keys())
+
+# Pipeline version and hash of the description each row was judged with
+TRACKING_COLUMNS = ['ai_pipeline_version', 'ai_content_hash']
+
+def ensure_tracking_columns(cur, table, available_columns):
+    """Add the tracking columns to base tables (views can't take new columns)"""
+    missing = [c for c in TRACKING_COLUMNS if c not in available_columns]
+    if not missing:
+        return True
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (f"public.{table}",))
+    relkind = cur.fetchone()
+    if not relkind or relkind[0] not in ('r', 'p'):
+        return False
+    for column in missing:
+        logging.info(f"🧱 Adding {column} column to {table}")
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} TEXT")
+    return True
+
+def preprocess_chunks(preprocessor, chunks, table):
+    """
+    Pipeline stage: chunks of rows -> chunks of (row, features, text_to_analyze)
+    Banglish rows of a chunk are translated with one batched call
+    """
+    for rows in chunks:
+        # 1. Preprocess & Detect Language for the whole chunk
+        prepared = []
+        for row in rows:
+            complaint_id = row[0]
+            description = row[1]
+            
+            if not description:
+                logging.warning(f"⚠️ Skipping ID {complaint_id}: No description")
+                continue
+            
+            try:
+                # extract_features already cleans the text; reuse its result
+                cleaned_text, features = preprocessor.preprocess(description)
+                prepared.append((row, cleaned_text, features))
+            except Exception as e:
+                logging.error(f"❌ Error processing ID {complaint_id} in {table}: {str(e)}")
+        
+        # 2. If Banglish (mixed), translate to Bengali - one batched call per chunk
+        banglish = [i for i, (_, _, features) in enumerate(prepared) if features.get('language', 'en') == 'mixed']
+        translations = {}
+        if banglish:
+            logging.info(f"🔄 Translating {len(banglish)} Banglish complaints to Bengali...")
+            translated = preprocessor.convert_banglish_to_bangla_batch([prepared[i][1] for i in banglish])
+            translations = dict(zip(banglish, translated))
+        
+        yield [
+            (row, features, translations.get(i, row[1]))
+            for i, (row, _, features) in enumerate(prepared)
+        ], len(rows)
+
+def analyze_chunks(classifier, prepared_chunks, columns, table):
+    """Pipeline stage: prepared chunks -> chunks of (id, column values) ready to write"""
+    for prepared, rows_read in prepared_chunks:
+        results = []
+        for row, features, text_to_analyze in prepared:
+            complaint_id = row[0]
+            try:
+                # 3. Run Analysis on translated/original text
+                analysis = classifier.analyze_complaint(text_to_analyze, features)
+                fields = analysis_fields(analysis)
+                results.append((complaint_id, [fields[c] for c in columns]))
+            except Exception as e:
+                logging.error(f"❌ Error processing ID {complaint_id} in {table}: {str(e)}")
+        yield results, rows_read
+
+def rejudge_table(conn, table, preprocessor, classifier, checkpoints, pipeline_version, restart=False,
+                  id_range=None, progress=None):
+    """
+    Re-judge one table in id-ordered keyset pages, resuming from its checkpoint
+    id_range: (first_id, last_id) to limit the job to one partition
+    progress: called with the row count of each committed page (default: print)
+    Returns rows processed, written and not written (errors)
+    """
+    cur = conn.cursor()
+    
+    # Get available columns to construct dynamic update query
+    available_columns = get_columns(cur, table)
+    tracked = ensure_tracking_columns(cur, table, available_columns)
+    conn.commit()
+    columns = [c for c in ANALYSIS_COLUMNS if c in available_columns]
+    expressions = {'ai_analysis_date': 'NOW()'} if 'ai_analysis_date' in available_columns else {}
+    if not columns and not expressions:
+        logging.warning(f"⚠️ Table {table} has no analysis columns. Skipping.")
+        return {'rows': 0, 'written': 0, 'errors': 0}
+    write_columns = columns + (TRACKING_COLUMNS if tracked else [])
+    
+    # Resume after the last committed page of an unfinished pass with this pipeline
+    # version; a finished pass starts over and only picks up changed rows
+    last_id = id_range[0] - 1 if id_range else 0
+    rows_done = 0
+    checkpoint = None if restart else checkpoints.load(table)
+    if checkpoint and checkpoint['pipeline_version'] == pipeline_version and not checkpoint['completed']:
+        last_id, rows_done = checkpoint['last_id'], checkpoint['rows_done']
+        logging.info(f"⏩ Resuming {table} after id {last_id} ({rows_done} rows done)")
+    elif checkpoint and checkpoint['pipeline_version'] != pipeline_version:
+        logging.info(f"🔁 Pipeline changed ({checkpoint['pipeline_version']} -> {pipeline_version}), re-judging {table}")
+    
+    filters, filter_params = [], []
+    if id_range:
+        filters.append("id <= %s")
+        filter_params.append(id_range[1])
+    # Rows already judged with this version and an unchanged description are skipped
+    if tracked and not restart:
+        description_hash = CONTENT_HASH_SQL.format(column='description')
+        filters.append(f"(ai_pipeline_version IS DISTINCT FROM %s OR ai_content_hash IS DISTINCT FROM {description_hash})")
+        filter_params.append(pipeline_version)
+    where = ''.join(f" AND {f}" for f in filters)
+    query = (f"SELECT id, description, shop_name, complaint_number FROM {table} "
+             f"WHERE id > %s{where} ORDER BY id LIMIT %s")
+    
+    cur.execute(f"SELECT count(*) FROM {table} WHERE id > %s{where}", (last_id, *filter_params))
+    total = cur.fetchone()[0]
+    conn.commit()
+    if progress is None:
+        logging.info(f"📊 Found {total} complaints in {table} to re-judge...")
+    
+    # Results go back in chunks (COPY into a staging table + one UPDATE per chunk);
+    # commits happen per page, together with the checkpoint
+    writer = BulkResultWriter(conn, table, write_columns, expressions=expressions, auto_commit=False)
+    processed = 0
+    
+    while True:
+        cur.execute(query, (last_id, *filter_params, PAGE_SIZE))
+        page = cur.fetchall()
+        if not page:
+            break
+        
+        # preprocess -> analyze -> write, a chunk at a time
+        hashes = {row[0]: content_hash(row[1]) for row in page if row[1]} if tracked else {}
+        prepared_chunks = preprocess_chunks(preprocessor, chunked(page, CHUNK_SIZE), table)
+        for results, _ in analyze_chunks(classifier, prepared_chunks, columns, table):
+            if tracked:
+                results = [(complaint_id, values + [pipeline_version, hashes[complaint_id]])
+                           for complaint_id, values in results]
+            writer.add_many(results)
+        writer.flush()
+        
+        last_id = page[-1][0]
+        rows_done += len(page)
+        processed += len(page)
+        checkpoints.save(table, last_id, pipeline_version, rows_done)
+        writer.commit()
+        if progress is None:
+            print(f"Processed {processed}/{total} in {table} (last id {last_id})", end='\r')
+        else:
+            progress(len(page))
+    
+    checkpoints.save(table, last_id, pipeline_version, rows_done, completed=True)
+    writer.close()
+    conn.commit()
+    cur.close()
+    if progress is None:
+        logging.info(f"✅ Finished updating {table}. Total: {writer.rows_written} ({writer.stats()})")
+    return {'rows': processed, 'written': writer.rows_written, 'errors': processed - writer.rows_written}
+
+def plan_ranges(cur, table, parts):
+    """Split [min(id), max(id)] into up to `parts` contiguous ranges of equal width"""
+    cur.execute(f"SELECT min(id), max(id) FROM {table}")
+    low, high = cur.fetchone()
+    if low is None:
+        return []
+    width = max(1, -(-(high - low + 1) // parts))
+    return [(start, min(start + width - 1, high)) for start in range(low, high + 1, width)]
+
+# Per-process state of a parallel rejudge worker (set by _init_worker)
+_worker = {}
+
+def _init_worker(restart, progress_queue, torch_threads):
+    """Give each worker process its own connection, preprocessor and classifier"""
+    configure_threads(torch_threads)
+    
+    conn = psycopg2.connect(DATABASE_URL)
+    preprocessor = TextPreprocessor(
+        use_banglishbert=True,
+        translation_cache_path=config.TRANSLATION_CACHE_PATH or 'translation_cache.sqlite'
+    )
+    _worker.update(
+        conn=conn,
+        preprocessor=preprocessor,
+        classifier=ComplaintClassifier(),
+        pipeline_version=pipeline_fingerprint(preprocessor.translation_backend()),
+        restart=restart,
+        progress_queue=progress_queue
+    )
+
+def _rejudge_range(task):
+    """Pool task: re-judge one id range of a table, reporting pages to the coordinator"""
+    table, id_range = task
+    progress_queue = _worker['progress_queue']
+    try:
+        # Each range has its own checkpoint, so a rerun with the same plan resumes per range
+        checkpoints = CheckpointStore(
+            _worker['conn'], f"{JOB_NAME}:{id_range[0]}-{id_range[1]}", create_table=False
+        )
+        result = rejudge_table(
+            _worker['conn'], table, _worker['preprocessor'], _worker['classifier'], checkpoints,
+            _worker['pipeline_version'], _worker['restart'], id_range=id_range,
+            progress=lambda rows: progress_queue.put(rows)
+        )
+        _worker['preprocessor'].translation_cache.flush()
+        return table, id_range, result, None
+    except Exception as e:
+        _worker['conn'].rollback()
+        return table, id_range, None, str(e)
+
+def rejudge_parallel(workers, restart=False):
+    """Re-judge all tables with a pool of worker processes, one id range per task"""
+    if not DATABASE_URL:
+        logging.error("❌ DATABASE_URL not found")
+        return
+    
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    tasks, total = [], 0
+    for table in TABLES:
+        cur.execute(f"SELECT to_regclass('public.{table}');")
+        if not cur.fetchone()[0]:
+            logging.warning(f"⚠️ Table {table} does not exist. Skipping.")
+            continue
+        # Schema changes happen once, here, not concurrently in the workers
+        ensure_tracking_columns(cur, table, get_columns(cur, table))
+        ranges = plan_ranges(cur, table, workers * RANGES_PER_WORKER)
+        cur.execute(f"SELECT count(*) FROM {table}")
+        total += cur.fetchone()[0]
+        tasks += [(table, id_range) for id_range in ranges]
+    conn.commit()
+    cur.close()
+    if tasks:
+        # Like the columns above, created once here: the workers skip DDL
+        ensure_checkpoint_table(conn)
+    conn.close()
+    if not tasks:
+        return
+    
+    # Build the shared read-only state before forking: the Banglish dictionary
+    # is memory-mapped and the fuzzy index is inherited copy-on-write. gc.freeze
+    # keeps the collector from touching (and so copying) those pages in workers
+    ctx = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+    get_fuzzy_index()
+    gc.freeze()
+    
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    progress_queue = ctx.Queue()
+    logging.info(f"🚀 Re-judging {len(tasks)} id ranges with {workers} workers ({torch_threads} torch threads each)")
+    
+    processed, written, errors, failed_ranges = 0, 0, 0, []
+    started = time.monotonic()
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(restart, progress_queue, torch_threads)) as pool:
+        results = pool.imap_unordered(_rejudge_range, tasks)
+        remaining = len(tasks)
+        while remaining:
+            # Drain page progress while waiting for ranges to finish
+            try:
+                table, id_range, result, error = results.next(timeout=1)
+            except multiprocessing.TimeoutError:
+                result = None
+            else:
+                remaining -= 1
+                if error:
+                    failed_ranges.append((table, id_range))
+                    logging.error(f"❌ Range {id_range} of {table} failed: {error}")
+                elif result:
+                    written += result['written']
+                    errors += result['errors']
+            
+            while True:
+                try:
+                    processed += progress_queue.get_nowait()
+                except queue.Empty:
+                    break
+            elapsed = time.monotonic() - started
+            print(f"Processed {processed} (of up to {total}) | {processed / max(elapsed, 1e-9):.1f} rows/s | "
+                  f"errors {errors} | ranges left {remaining}", end='\r')
+    
+    gc.unfreeze()
+    elapsed = time.monotonic() - started
+    logging.info(f"✅ Processed {processed} rows in {elapsed:.1f}s ({processed / max(elapsed, 1e-9):.1f} rows/s): "
+                 f"{written} written, {errors} errors, {len(failed_ranges)} failed ranges")
+    if failed_ranges:
+        logging.error(f"❌ Failed ranges (rerun to retry): {failed_ranges}")
+
+def rejudge(restart=False):
     if not DATABASE_URL:
         logging.error("❌ DATABASE_URL not found")
         return
@@ -34,12 +367,18 @@ def rejudge():
         
         # Enable BanglishBERT for Banglish translation
         logging.info("🚀 Initializing preprocessor with BanglishBERT...")
-        preprocessor = TextPreprocessor(use_banglishbert=True)
+        # Translations persist across runs so restarts don't redo them
+        preprocessor = TextPreprocessor(
+            use_banglishbert=True,
+            translation_cache_path=config.TRANSLATION_CACHE_PATH or 'translation_cache.sqlite'
+        )
         classifier = ComplaintClassifier()
         
-        tables_to_process = ['complaints', 'complaints_with_ai']
+        pipeline_version = pipeline_fingerprint(preprocessor.translation_backend())
+        logging.info(f"🏷️ Pipeline version: {pipeline_version}")
+        checkpoints = CheckpointStore(conn, JOB_NAME)
         
-        for table in tables_to_process:
+        for table in TABLES:
             logging.info(f"🔄 Processing table: {table}")
             
             # Check if table exists
@@ -47,114 +386,27 @@ def rejudge():
             if not cur.fetchone()[0]:
                 logging.warning(f"⚠️ Table {table} does not exist. Skipping.")
                 continue
-
-            # Get available columns to construct dynamic update query
-            available_columns = get_columns(cur, table)
-            
-            # Select rows
-            cur.execute(f"SELECT id, description, shop_name, complaint_number FROM {table}")
-            rows = cur.fetchall()
-            
-            logging.info(f"📊 Found {len(rows)} complaints in {table} to re-judge...")
             
-            updated_count = 0
-            
-            for row in rows:
-                complaint_id = row[0]
-                description = row[1]
-                shop_name = row[2] or ""
-                complaint_number = row[3] or "Unknown"
-                
-                if not description:
-                    logging.warning(f"⚠️ Skipping ID {complaint_id}: No description")
-                    continue
-                    
-                try:
-                    # Using BanglishBERT for Banglish translation
-                    # Detect if text is Banglish and convert to Bengali
-                    
-                    # 1. Preprocess & Detect Language
-                    cleaned_text = preprocessor.clean_text(description)
-                    features = preprocessor.extract_features(description)
-                    detected_lang = features.get('language', 'en')
-                    
-                    # 2. If Banglish (mixed), translate to Bengali
-                    text_to_analyze = description
-                    if detected_lang == 'mixed':
-                        logging.info(f"🔄 Translating Banglish to Bengali for complaint {complaint_number}...")
-                        text_to_analyze = preprocessor.convert_banglish_to_bangla(cleaned_text)
-                        logging.info(f"✅ Translated: {text_to_analyze[:100]}...")
-                    
-                    # 3. Run Analysis on translated/original text
-                    analysis = classifier.analyze_complaint(text_to_analyze, features)
-                    
-                    validity = analysis.get("validity", {})
-                    priority = analysis.get("priority", {})
-                    severity = analysis.get("severity", {})
-                    sentiment = analysis.get("sentiment", {})
-                    category = analysis.get("category", {})
-
-                    # Construct Update Fields based on available columns
-                    update_fields = []
-                    params = []
-
-                    # Map analysis fields to DB columns
-                    field_mapping = {
-                        'validity_score': (validity.get("validity_score", 0), 'validity_score'),
-                        'is_valid': (validity.get("is_valid", False), 'is_valid'),
-                        'validity_reasons': (validity.get("reasons", []), 'validity_reasons'),
-                        'ai_priority_score': (priority.get("priority_score", 0), 'ai_priority_score'),
-                        'ai_priority_level': (priority.get("priority_level", "Low"), 'ai_priority_level'),
-                        'priority_reasons': (priority.get("reasons", []), 'priority_reasons'),
-                        'sentiment_score': (sentiment.get("sentiment_score", 0), 'sentiment_score'),
-                        'sentiment': (sentiment.get("sentiment", "neutral"), 'sentiment'),
-                        'emotion_intensity': (sentiment.get("emotion_intensity", "neutral"), 'emotion_intensity'),
-                        'ai_category': (category.get("category", "Other"), 'ai_category'),
-                        'ai_category_confidence': (str(category.get("confidence", 0)), 'ai_category_confidence'),
-                        'matched_keywords': (1 if category.get("matched_keywords") else 0, 'matched_keywords'), # Integer count or list? DB says integer usually, but let's check. check_tables said integer.
-                        'ai_summary': (analysis.get("summary", ""), 'ai_summary'),
-                        'detected_language': (analysis.get("language", "en"), 'detected_language'),
-                        'ai_analysis_date': ('NOW()', 'ai_analysis_date'),
-                        'ai_full_analysis': (json.dumps(analysis), 'ai_full_analysis')
-                    }
-
-                    for key, (value, col_name) in field_mapping.items():
-                        if col_name in available_columns:
-                            if col_name == 'ai_analysis_date':
-                                update_fields.append(f"{col_name} = NOW()")
-                            else:
-                                update_fields.append(f"{col_name} = %s")
-                                params.append(value)
-                    
-                    if not update_fields:
-                        continue
-
-                    params.append(complaint_id)
-                    
-                    sql = f"UPDATE {table} SET {', '.join(update_fields)} WHERE id = %s"
-                    
-                    cur.execute(sql, tuple(params))
-                    
-                    updated_count += 1
-                    if updated_count % 10 == 0:
-                        conn.commit()
-                        print(f"Processed {updated_count}/{len(rows)} in {table}", end='\r')
-                        
-                except Exception as e:
-                    logging.error(f"❌ Error processing ID {complaint_id} in {table}: {str(e)}")
-                    conn.rollback()
-                    continue
-            
-            conn.commit()
-            logging.info(f"✅ Finished updating {table}. Total: {updated_count}")
-
+            rejudge_table(conn, table, preprocessor, classifier, checkpoints, pipeline_version, restart)
             
         cur.close()
         conn.close()
+        preprocessor.translation_cache.flush()
+        logging.info(f"📦 Translation cache: {preprocessor.cache_stats()}")
         logging.info("🎉 All tables processed successfully!")
 
     except Exception as e:
         logging.error(f"❌ Critical Error: {str(e)}")
 
 if __name__ == "__main__":
-    rejudge()
+    parser = argparse.ArgumentParser(description="Re-judge stored complaints with the current pipeline")
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore checkpoints, pipeline versions and content hashes and re-judge every row")
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help="worker processes, each over its own id ranges (0 = one per CPU)")
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    if workers > 1:
+        rejudge_parallel(workers, restart=args.restart)
+    else:
+        rejudge(restart=args.restart)
@@ -0,0 +1,158 @@
+"""
+Pre-forked Production Server
+Loads the NLP pipeline (Banglish dictionary, fuzzy index and any models in
+model_registry.SERVICE_MODELS) once in the parent, freezes it out of the garbage collector and forks N uvicorn workers
+that accept on one shared socket. Workers inherit the loaded state
+copy-on-write, so throughput scales with cores while the weights are held once.
+
+Usage: python serve.py [--workers N] [--threads T] [--host H] [--port P]
+
+With INFERENCE_BACKEND=onnx each worker loads its own (int8) sessions after
+the fork instead, since ONNX Runtime thread pools cannot be inherited.
+
+main.py keeps the single-process development server (with auto-reload).
+Each worker keeps its own metrics, caches and micro-batcher: /metrics shows
+the worker that answered the scrape.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+
+from config import config
+from model_registry import SERVICE_MODELS, configure_threads, model_registry
+
+# A worker that dies sooner than this after starting is restarted with a delay
+MIN_WORKER_UPTIME = 5.0
+RESPAWN_DELAY = 1.0
+
+
+def load_pipeline():
+    """Import the app and load everything the workers should share"""
+    import main
+    from banglish_dict import get_fuzzy_index
+
+    get_fuzzy_index()
+    if SERVICE_MODELS and not config.RULES_ONLY and config.INFERENCE_BACKEND == 'torch':
+        # Load weights only; running inference here would start torch's thread
+        # pools, which do not survive fork
+        print("📦 Loading models in the parent process...")
+        model_registry.warm_up(SERVICE_MODELS)
+        print(f"📦 Models: {model_registry.states()}")
+    return main.app
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(config.SERVE_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, torch_threads: int):
+    """Child process: serve the shared socket until told to stop"""
+    # The parent's handlers only forward signals; uvicorn installs its own
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    configure_threads(torch_threads)
+    if SERVICE_MODELS and not config.RULES_ONLY and config.INFERENCE_BACKEND != 'torch':
+        # ONNX Runtime sessions start their thread pools when created, and
+        # threads do not survive fork: each worker loads its (int8) models
+        model_registry.warm_up(SERVICE_MODELS)
+
+    server = uvicorn.Server(uvicorn.Config(
+        app,
+        log_level=config.LOG_LEVEL.lower(),
+        lifespan='on'
+    ))
+    server.run(sockets=[sock])
+
+
+def spawn_worker(app, sock: socket.socket, torch_threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(app, sock, torch_threads)
+        except BaseException as e:
+            print(f"❌ Worker {os.getpid()} crashed: {e}", file=sys.stderr)
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(workers: int, torch_threads: int, host: str, port: int):
+    app = load_pipeline()
+    sock = bind_socket(host, port)
+
+    # Keep the collector from touching (and so copying) the inherited objects
+    gc.collect()
+    gc.freeze()
+
+    print(f"🚀 Serving on {host}:{port} with {workers} workers ({torch_threads} torch threads each)")
+    children: Dict[int, float] = {}  # pid -> start time
+    stopping = False
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        children[spawn_worker(app, sock, torch_threads)] = time.monotonic()
+    print(f"👷 Workers: {', '.join(map(str, children))}")
+    if stopping:
+        stop(signal.SIGTERM, None)  # signalled while forking
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+
+        code = os.waitstatus_to_exitcode(status)
+        print(f"⚠️ Worker {pid} exited ({code}), starting a new one", file=sys.stderr)
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            time.sleep(RESPAWN_DELAY)
+        if not stopping:
+            children[spawn_worker(app, sock, torch_threads)] = time.monotonic()
+
+    sock.close()
+    print("👋 All workers stopped")
+
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Run the NLP service with pre-forked workers")
+    parser.add_argument('--workers', type=int, default=config.SERVE_WORKERS,
+                        help="worker processes (0 = one per CPU)")
+    parser.add_argument('--threads', type=int, default=config.TORCH_THREADS_PER_WORKER,
+                        help="torch/ONNX Runtime intra-op threads per worker (0 = CPUs / workers)")
+    parser.add_argument('--host', default=config.SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=config.SERVICE_PORT)
+    args = parser.parse_args()
+
+    workers = args.workers or cpus
+    torch_threads = args.threads or max(1, cpus // workers)
+    serve(workers, torch_threads, args.host, args.port)
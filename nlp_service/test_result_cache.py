@@ -0,0 +1,52 @@
+"""
+Regression checks for the analysis result cache
+Texts that clean to the same string but are detected as different languages
+(a Bengali complaint with and without a trailing URL) must not share a result,
+and keys must not change when a translation model loads
+"""
+
+import os
+
+# Keep the check in memory: no SQLite tier, no model loading
+os.environ['RESULT_CACHE_PATH'] = ''
+os.environ['NLP_MODE'] = 'rules'
+
+import main
+
+BENGALI = "আমি গতকাল এই দোকান থেকে একটি মেয়াদোত্তীর্ণ পণ্য কিনেছি। পণ্যটি খাওয়ার পর আমার স্বাস্থ্য সমস্যা হয়েছে।"
+WITH_URL = BENGALI + " https://example.com/receipt/photo-of-the-expired-product-package-and-bill"
+
+
+def test_language_is_part_of_the_key():
+    preprocessor = main.preprocessor
+    assert preprocessor.clean_text(WITH_URL) == preprocessor.clean_text(BENGALI)
+    assert preprocessor.detect_language(WITH_URL) != preprocessor.detect_language(BENGALI)
+
+    [(_, with_url, _)] = main.run_cached_analysis_batch([WITH_URL])
+    [(_, plain, cached)] = main.run_cached_analysis_batch([BENGALI])
+    fresh = main.batch_engine.analyze([BENGALI])[0][0]
+
+    print(f"With URL: {with_url['language']}, without: {plain['language']} (cached={cached})")
+    assert not cached
+    assert plain['language'] == fresh['language'] == 'bn'
+
+    # The same text again is a hit
+    [(_, again, cached)] = main.run_cached_analysis_batch([BENGALI])
+    assert cached and again['language'] == 'bn'
+
+
+def test_key_ignores_translation_backend():
+    """Loading BanglishBERT must not invalidate cached service results"""
+    key = main.result_cache_key(BENGALI, 'bn')
+    backend = main.preprocessor.translation_backend
+    main.preprocessor.translation_backend = lambda load=True: 'banglishbert:beams=5'
+    try:
+        assert main.result_cache_key(BENGALI, 'bn') == key
+    finally:
+        main.preprocessor.translation_backend = backend
+
+
+if __name__ == "__main__":
+    test_language_is_part_of_the_key()
+    test_key_ignores_translation_backend()
+    print("✅ Result cache keys are correct")
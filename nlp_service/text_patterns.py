@@ -0,0 +1,83 @@
+"""
+Shared Text Patterns
+Precompiled regular expressions used by the preprocessor and the classifier,
+and a character-class profile that replaces the per-feature regex scans of
+extract_features with a single str.translate pass plus C-level counts.
+"""
+
+import re
+from typing import Dict
+
+import emoji
+
+# Cleaning
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+EMAIL_PATTERN = re.compile(r'\S+@\S+')
+REPEATED_PUNCTUATION = re.compile(r'([!?.]){2,}')
+
+# Every non-ASCII character that occurs in an emoji sequence; a text with none
+# of them has nothing for emoji.demojize to replace
+EMOJI_CHARS = frozenset(
+    char for sequence in emoji.EMOJI_DATA for char in sequence if not char.isascii()
+)
+
+# Character classes
+BENGALI_CHAR = re.compile(r'[\u0980-\u09FF]')
+DIGIT = re.compile(r'\d')
+ASCII_DIGIT = re.compile(r'[0-9]')
+WORD_VOWEL = re.compile(r'[aeiouy]')
+
+# Gibberish indicators
+REPEATED_RUN = re.compile(r'(.)\1{2,}')
+
+# Sentences (Bengali danda or Latin punctuation)
+SENTENCE_END = re.compile(r'[।.!?]')
+
+# Bengali dependent vowel signs: া ি ী ু ূ ৃ ে ৈ ো ৌ
+BENGALI_VOWEL_SIGNS = 'ািীুূৃেৈোৌ'
+
+
+def _class_table() -> Dict[int, str]:
+    """
+    Map every character we count onto a one-letter class:
+    'B' Bengali, 'V' Bengali vowel sign, 'c' English consonant, 'v' English
+    vowel. Everything else is left as is (and never equals a class letter,
+    since all ASCII letters are remapped).
+    """
+    table = {}
+    for code in range(0x0980, 0x0A00):
+        table[code] = 'B'
+    for sign in BENGALI_VOWEL_SIGNS:
+        table[ord(sign)] = 'V'
+    for letter in 'abcdefghijklmnopqrstuvwxyz':
+        letter_class = 'v' if letter in 'aeiou' else 'c'
+        table[ord(letter)] = letter_class
+        table[ord(letter.upper())] = letter_class
+    # Lowercases to 'k', so it took part in consonant clusters of text.lower()
+    table[0x212A] = 'n'
+    return table
+
+
+_CLASS_TABLE = _class_table()
+_CONSONANT_CLASS_RUN = re.compile(r'[cn]{4,}')
+
+
+def char_profile(text: str) -> Dict[str, int]:
+    """
+    Character counts of a text from one translate pass:
+    bengali, bengali_vowel_signs, english, english_vowels, consonant_clusters
+    (runs of 4+ English consonants, as matched on text.lower())
+    """
+    classes = text.translate(_CLASS_TABLE)
+    bengali_vowel_signs = classes.count('V')
+    english_consonants = classes.count('c')
+    kelvin_signs = classes.count('n')
+    consonants = english_consonants + kelvin_signs
+    english_vowels = classes.count('v')
+    return {
+        'bengali': classes.count('B') + bengali_vowel_signs,
+        'bengali_vowel_signs': bengali_vowel_signs,
+        'english': english_consonants + english_vowels,
+        'english_vowels': english_vowels,
+        'consonant_clusters': len(_CONSONANT_CLASS_RUN.findall(classes)) if consonants >= 4 else 0
+    }
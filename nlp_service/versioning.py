@@ -0,0 +1,68 @@
+"""
+Pipeline Versioning
+A short fingerprint of everything that decides an analysis result: the rule
+code version, keyword lists, thresholds, the Banglish dictionary and the
+translation backend. Batch jobs store it with each judged row, next to a hash
+of the text that was judged, so they can tell which rows are already up to date.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from banglish_dict import DICT_BIN_PATH, DICT_JSON_PATH
+from config import config
+
+# Bump when detector or preprocessing code changes in a way that alters results
+RULES_VERSION = 1
+
+# Config settings the rule-based pipeline reads
+RULE_SETTINGS = [
+    'PRIORITY_KEYWORDS',
+    'SPAM_KEYWORDS',
+    'SEVERITY_KEYWORDS',
+    'CATEGORY_KEYWORDS',
+    'CONTEXT_KEYWORDS',
+    'HEALTH_TERMS',
+    'FINANCIAL_TERMS',
+    'SENTIMENT_KEYWORDS',
+    'VALIDITY_THRESHOLD',
+    'HIGH_PRIORITY_THRESHOLD',
+    'URGENT_PRIORITY_THRESHOLD',
+]
+
+
+def _file_digest(path: str) -> str:
+    if not os.path.exists(path):
+        return ''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# SQL expression equal to content_hash() of a text column, for filtering in the database
+CONTENT_HASH_SQL = "encode(sha256(convert_to({column}, 'UTF8')), 'hex')"
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 (hex) of the exact text; matches CONTENT_HASH_SQL"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def pipeline_fingerprint(translation_backend: str = 'dictionary') -> str:
+    """
+    Version string such as 'v1-3f2a9c0b7d1e'
+    translation_backend: see TextPreprocessor.translation_backend()
+    """
+    dictionary_path = DICT_JSON_PATH if os.path.exists(DICT_JSON_PATH) else DICT_BIN_PATH
+    payload = json.dumps({
+        'rules_version': RULES_VERSION,
+        'settings': {name: getattr(config, name) for name in RULE_SETTINGS},
+        'dictionary': _file_digest(dictionary_path),
+        'translation': translation_backend
+    }, sort_keys=True, ensure_ascii=False)
+    return f"v{RULES_VERSION}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]}"